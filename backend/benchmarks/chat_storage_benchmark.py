@@ -0,0 +1,234 @@
+import time
+import uuid
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import (
+    MetaData, Table, Column, Integer, String, DateTime, Text, Index,
+    create_engine, select, text, func,
+)
+
+from benchmarks.stats import summarize, print_report, write_report
+
+legacy_metadata = MetaData()
+
+legacy_session = Table(
+    "legacy_chat_session",
+    legacy_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("chat_id", String(36), nullable=False),
+    Column("user_uuid", String(36), nullable=False),
+    Column("title", String(255)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Index("ix_legacy_chat_session_id", "id"),
+    Index("ix_legacy_chat_session_chat_id", "chat_id", unique=True),
+    Index("ix_legacy_chat_session_user_uuid", "user_uuid"),
+)
+
+legacy_message = Table(
+    "legacy_chat_message",
+    legacy_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("chat_id", String(36), nullable=False),
+    Column("user_uuid", String(36), nullable=False),
+    Column("role", String(10), nullable=False),
+    Column("content", Text, nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Index("ix_legacy_chat_message_id", "id"),
+    Index("ix_legacy_chat_message_chat_id", "chat_id"),
+    Index("ix_legacy_chat_message_user_uuid", "user_uuid"),
+)
+
+MESSAGE_TEXT = "نحوه درخواست مرخصی تحصیلی چگونه است و چه مدارکی لازم دارد؟ " * 3
+
+
+def schema_tables(schema: str):
+    if schema == "legacy":
+        return legacy_session, legacy_message
+    from models import ChatSession, ChatMessage
+    return ChatSession.__table__, ChatMessage.__table__
+
+
+def random_uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def generate_chats(args, rng: random.Random):
+    users = [random_uuid(rng) for _ in range(args.users)]
+    now = datetime.now(timezone.utc)
+    span_seconds = args.months * 30 * 24 * 3600
+    num_chats = args.messages // args.messages_per_chat
+    for _ in range(num_chats):
+        started_at = now - timedelta(seconds=rng.uniform(0, span_seconds))
+        yield rng.choice(users), random_uuid(rng), started_at
+
+
+def load(engine, schema: str, args) -> tuple[dict, list[tuple[str, str]]]:
+    session_table, message_table = schema_tables(schema)
+    rng = random.Random(args.seed)
+    legacy = schema == "legacy"
+    chats = []
+    pending_sessions, pending_messages = [], []
+    batch_latencies = []
+    inserted = 0
+
+    def flush(conn):
+        start = time.perf_counter()
+        if pending_sessions:
+            conn.execute(session_table.insert(), pending_sessions)
+        conn.execute(message_table.insert(), pending_messages)
+        conn.commit()
+        batch_latencies.append((time.perf_counter() - start) * 1000)
+        pending_sessions.clear()
+        pending_messages.clear()
+
+    load_start = time.perf_counter()
+    with engine.connect() as conn:
+        for user_uuid, chat_id, started_at in generate_chats(args, rng):
+            chats.append((user_uuid, chat_id))
+            pending_sessions.append({"chat_id": chat_id, "user_uuid": user_uuid, "title": "bench", "created_at": started_at})
+            for i in range(args.messages_per_chat):
+                message = {
+                    "chat_id": chat_id,
+                    "role": "user" if i % 2 == 0 else "assistant",
+                    "content": MESSAGE_TEXT,
+                    "created_at": started_at + timedelta(seconds=30 * i),
+                }
+                if legacy:
+                    message["user_uuid"] = user_uuid
+                pending_messages.append(message)
+            if len(pending_messages) >= args.batch_size:
+                inserted += len(pending_messages)
+                flush(conn)
+                if len(batch_latencies) % 100 == 0:
+                    print(f"[{schema}] {inserted:,} messages inserted")
+        if pending_messages:
+            inserted += len(pending_messages)
+            flush(conn)
+    load_seconds = time.perf_counter() - load_start
+
+    tenth = max(1, len(batch_latencies) // 10)
+    report = {
+        "messages": inserted,
+        "chats": len(chats),
+        "load_seconds": load_seconds,
+        "messages_per_second": inserted / load_seconds if load_seconds else 0.0,
+        "first_10pct_batches": summarize(batch_latencies[:tenth], load_seconds),
+        "last_10pct_batches": summarize(batch_latencies[-tenth:], load_seconds),
+    }
+    return report, chats
+
+
+def existing_chats(engine, schema: str, limit: int) -> list[tuple[str, str]]:
+    session_table, _ = schema_tables(schema)
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(session_table.c.user_uuid, session_table.c.chat_id).limit(limit)).all()
+    return [(str(row.user_uuid), str(row.chat_id)) for row in rows]
+
+
+def measure_reads(engine, schema: str, chats: list[tuple[str, str]], args) -> dict:
+    session_table, message_table = schema_tables(schema)
+    rng = random.Random(args.seed + 1)
+    sample = [rng.choice(chats) for _ in range(args.reads)]
+
+    def history_conditions(user_uuid, chat_id):
+        if schema == "legacy":
+            return [message_table.c.chat_id == chat_id, message_table.c.user_uuid == user_uuid]
+        return [message_table.c.chat_id == chat_id]
+
+    order = [message_table.c.created_at.asc()]
+    if schema != "legacy":
+        order.append(message_table.c.id.asc())
+
+    history, sessions = [], []
+    with engine.connect() as conn:
+        start = time.perf_counter()
+        for user_uuid, chat_id in sample:
+            call_start = time.perf_counter()
+            conn.execute(
+                select(message_table.c.role, message_table.c.content, message_table.c.created_at)
+                .where(*history_conditions(user_uuid, chat_id))
+                .order_by(*order)).all()
+            history.append((time.perf_counter() - call_start) * 1000)
+
+            call_start = time.perf_counter()
+            conn.execute(
+                select(session_table.c.chat_id, session_table.c.title, session_table.c.created_at)
+                .where(session_table.c.user_uuid == user_uuid)
+                .order_by(session_table.c.created_at.desc())).all()
+            sessions.append((time.perf_counter() - call_start) * 1000)
+        wall_seconds = time.perf_counter() - start
+
+    return {
+        f"{schema}: message history": summarize(history, wall_seconds),
+        f"{schema}: session list": summarize(sessions, wall_seconds),
+    }
+
+
+def measure_sizes(engine, schema: str) -> dict:
+    if engine.dialect.name != "postgresql":
+        return {}
+    sizes = {}
+    with engine.connect() as conn:
+        for table in schema_tables(schema):
+            row = conn.execute(text("""
+                SELECT sum(pg_table_size(relid)) AS table_bytes, sum(pg_indexes_size(relid)) AS index_bytes
+                FROM pg_partition_tree(CAST(:name AS regclass))
+            """), {"name": table.name}).one()
+            sizes[table.name] = {"table_bytes": int(row.table_bytes or 0), "index_bytes": int(row.index_bytes or 0)}
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Insert and history-read cost of the chat tables at scale")
+    parser.add_argument("--database-url", required=True, help="Use a dedicated PostgreSQL database")
+    parser.add_argument("--schema", choices=["legacy", "compact", "both"], default="both")
+    parser.add_argument("--messages", type=int, default=10_000_000)
+    parser.add_argument("--messages-per-chat", type=int, default=20)
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--reads", type=int, default=2_000)
+    parser.add_argument("--skip-load", action="store_true", help="Only measure reads on already loaded data")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    schemas = ["legacy", "compact"] if args.schema == "both" else [args.schema]
+    report = {"settings": vars(args)}
+    rows = {}
+    for schema in schemas:
+        # Tables that already exist are reused, so a database migrated with
+        # -x partition_chat_message=monthly benchmarks the partitioned layout.
+        if schema == "legacy":
+            legacy_metadata.create_all(engine)
+        else:
+            from core.db import Base
+            Base.metadata.create_all(engine, tables=list(schema_tables(schema)))
+
+        if args.skip_load:
+            chats = existing_chats(engine, schema, 100_000)
+        else:
+            report[f"{schema}_load"], chats = load(engine, schema, args)
+            load_report = report[f"{schema}_load"]
+            print(f"[{schema}] {load_report['messages']:,} messages in {load_report['load_seconds']:.0f}s "
+                  f"({load_report['messages_per_second']:,.0f} msg/s)")
+            rows[f"{schema}: insert batch (first 10%)"] = load_report["first_10pct_batches"]
+            rows[f"{schema}: insert batch (last 10%)"] = load_report["last_10pct_batches"]
+        rows.update(measure_reads(engine, schema, chats, args))
+        report[f"{schema}_sizes"] = measure_sizes(engine, schema)
+        for table, size in report[f"{schema}_sizes"].items():
+            print(f"[{schema}] {table}: table {size['table_bytes'] / 2**20:,.0f} MiB, "
+                  f"indexes {size['index_bytes'] / 2**20:,.0f} MiB")
+
+    report["results"] = rows
+    print_report("Chat storage benchmark (latencies in ms)", rows)
+    if args.output:
+        write_report(args.output, report)
+
+
+if __name__ == "__main__":
+    main()
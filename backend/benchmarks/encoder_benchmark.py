@@ -0,0 +1,114 @@
+import os
+import time
+import argparse
+
+import numpy as np
+
+from benchmarks.samples import BACKEND_DIR, load_chunks, load_sample_queries
+from benchmarks.stats import summarize, print_report, write_report
+from benchmarks.micro_benchmarks import FAISS_INDEXES
+
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> dict:
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    cosines = np.sort((reference * candidate).sum(axis=1))
+    return {
+        "mean": float(cosines.mean()),
+        "min": float(cosines[0]),
+        "p01": float(cosines[int(0.01 * (len(cosines) - 1))]),
+    }
+
+
+def retrieval_overlap(reference, candidate, queries: list[str], top_k: int) -> dict:
+    from langchain_community.vectorstores import FAISS
+    from utils.retrieval_module import DummyEmbeddings
+
+    overlaps = {}
+    reference_vectors = reference.encode(queries)
+    candidate_vectors = candidate.encode(queries)
+    for name in FAISS_INDEXES:
+        vectorstore = FAISS.load_local(
+            os.path.join("vectordb", f"{name}_faiss_index"),
+            embeddings=DummyEmbeddings(),
+            allow_dangerous_deserialization=True)
+        scores = []
+        for reference_vector, candidate_vector in zip(reference_vectors, candidate_vectors):
+            expected = {doc.page_content for doc in vectorstore.similarity_search_by_vector(reference_vector.tolist(), k=top_k)}
+            actual = {doc.page_content for doc in vectorstore.similarity_search_by_vector(candidate_vector.tolist(), k=top_k)}
+            scores.append(len(expected & actual) / max(len(expected), 1))
+        overlaps[name] = float(np.mean(scores))
+    return overlaps
+
+
+def measure_latency(encoder, queries: list[str], chunks: list[str], iterations: int, batch_size: int) -> dict:
+    for query in queries[:5]:
+        encoder.encode(query)
+
+    latencies = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        call_start = time.perf_counter()
+        encoder.encode(queries[i % len(queries)])
+        latencies.append((time.perf_counter() - call_start) * 1000)
+    single = summarize(latencies, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    encoder.encode(chunks, batch_size=batch_size)
+    batch_seconds = time.perf_counter() - start
+    return {"single_query": single, "batch_texts_per_second": len(chunks) / batch_seconds}
+
+
+def main():
+    from utils.encoder_module import ENCODER_BACKENDS, create_encoder
+
+    parser = argparse.ArgumentParser(description="Compare encoder backends against the PyTorch reference")
+    parser.add_argument("--model-path", default=None, help="Defaults to EMBEDDING_MODEL_PATH from the config")
+    parser.add_argument("--onnx-path", default=None, help="Defaults to ENCODER_ONNX_PATH from the config")
+    parser.add_argument("--backends", nargs="+", default=["torch_int8", "onnx"], choices=ENCODER_BACKENDS)
+    parser.add_argument("--threads", type=int, nargs="+", default=[0], help="Thread counts to try, 0 = library default")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    from core.config import config
+
+    model_path = args.model_path or config["EMBEDDING_MODEL_PATH"]
+    onnx_path = args.onnx_path or config["ENCODER_ONNX_PATH"]
+    chunks = load_chunks()
+    queries = load_sample_queries()
+
+    reference = create_encoder("torch", model_path)
+    reference_embeddings = reference.encode(chunks)
+    report = {"settings": vars(args), "torch": measure_latency(reference, queries, chunks, args.iterations, args.batch_size)}
+    rows = {"torch (reference)": report["torch"]["single_query"]}
+
+    for backend in args.backends:
+        for threads in args.threads:
+            label = f"{backend} threads={threads or 'default'}"
+            candidate = create_encoder(backend, model_path, onnx_path=onnx_path, num_threads=threads)
+            report[label] = {
+                "cosine": cosine_agreement(reference_embeddings, candidate.encode(chunks)),
+                "retrieval_overlap": retrieval_overlap(reference, candidate, queries, args.top_k),
+                **measure_latency(candidate, queries, chunks, args.iterations, args.batch_size),
+            }
+            rows[label] = report[label]["single_query"]
+
+    print_report(f"Single-query encode latency over {args.iterations} calls", rows)
+    print(f"\n{'backend':<32}{'cos mean':>10}{'cos min':>10}{'overlap@' + str(args.top_k):>12}{'batch texts/s':>16}")
+    print(f"{'torch (reference)':<32}{1.0:>10.4f}{1.0:>10.4f}{1.0:>12.3f}{report['torch']['batch_texts_per_second']:>16.1f}")
+    for label, result in report.items():
+        if "cosine" not in result:
+            continue
+        overlap = float(np.mean(list(result["retrieval_overlap"].values())))
+        print(f"{label:<32}{result['cosine']['mean']:>10.4f}{result['cosine']['min']:>10.4f}"
+              f"{overlap:>12.3f}{result['batch_texts_per_second']:>16.1f}")
+    if args.output:
+        write_report(args.output, report)
+
+
+if __name__ == "__main__":
+    main()
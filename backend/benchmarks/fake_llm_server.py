@@ -0,0 +1,156 @@
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+app = FastAPI()
+
+settings = {
+    "latency_ms": 800.0,
+    "jitter_ms": 200.0,
+    "token_delay_ms": 15.0,
+    "answer_tokens": 120,
+    "tool_rounds": 1,
+    "tool_name": "bachelor_tool",
+}
+
+ANSWER_WORDS = (
+    "برای این درخواست باید از طریق سامانه گلستان اقدام کنید و پس از تایید "
+    "دانشکده نتیجه در پیشخوان خدمت نمایش داده می‌شود"
+).split()
+
+
+def build_answer() -> str:
+    words = [ANSWER_WORDS[i % len(ANSWER_WORDS)] for i in range(settings["answer_tokens"])]
+    return " ".join(words)
+
+
+def last_user_content(messages: list[dict]) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            content = message.get("content") or ""
+            return content if isinstance(content, str) else json.dumps(content, ensure_ascii=False)
+    return ""
+
+
+def build_tool_call(messages: list[dict]) -> dict:
+    return {
+        "id": f"call_{uuid.uuid4().hex[:24]}",
+        "type": "function",
+        "function": {
+            "name": settings["tool_name"],
+            "arguments": json.dumps({"query": last_user_content(messages)[-200:]}, ensure_ascii=False),
+        },
+    }
+
+
+def should_call_tool(payload: dict) -> bool:
+    if not payload.get("tools"):
+        return False
+    tool_rounds_done = sum(1 for m in payload.get("messages", []) if m.get("role") == "tool")
+    return tool_rounds_done < settings["tool_rounds"]
+
+
+async def simulate_latency():
+    delay = settings["latency_ms"] + random.uniform(-settings["jitter_ms"], settings["jitter_ms"])
+    await asyncio.sleep(max(delay, 0.0) / 1000)
+
+
+def completion_body(payload: dict, message: dict, finish_reason: str) -> dict:
+    prompt_tokens = sum(len(str(m.get("content") or "").split()) for m in payload.get("messages", []))
+    completion_tokens = len((message.get("content") or "").split())
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": payload.get("model", "fake-llm"),
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason, "logprobs": None}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+async def stream_chunks(payload: dict, message: dict, finish_reason: str):
+    chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+    created = int(time.time())
+    model = payload.get("model", "fake-llm")
+
+    def chunk(delta: dict, reason=None) -> str:
+        body = {
+            "id": chunk_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": reason, "logprobs": None}],
+        }
+        return f"data: {json.dumps(body, ensure_ascii=False)}\n\n"
+
+    yield chunk({"role": "assistant", "content": ""})
+    if message.get("tool_calls"):
+        tool_calls = [dict(call, index=i) for i, call in enumerate(message["tool_calls"])]
+        yield chunk({"tool_calls": tool_calls})
+    else:
+        for word in message["content"].split(" "):
+            await asyncio.sleep(settings["token_delay_ms"] / 1000)
+            yield chunk({"content": word + " "})
+    yield chunk({}, finish_reason)
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/openai/v1/chat/completions")
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    payload = await request.json()
+    await simulate_latency()
+
+    if should_call_tool(payload):
+        message = {"role": "assistant", "content": None, "tool_calls": [build_tool_call(payload["messages"])]}
+        finish_reason = "tool_calls"
+    else:
+        message = {"role": "assistant", "content": build_answer()}
+        finish_reason = "stop"
+
+    if payload.get("stream"):
+        return StreamingResponse(stream_chunks(payload, message, finish_reason), media_type="text/event-stream")
+    return completion_body(payload, message, finish_reason)
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok", "settings": settings}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI/Groq-compatible chat completion stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--latency-ms", type=float, default=settings["latency_ms"])
+    parser.add_argument("--jitter-ms", type=float, default=settings["jitter_ms"])
+    parser.add_argument("--token-delay-ms", type=float, default=settings["token_delay_ms"])
+    parser.add_argument("--answer-tokens", type=int, default=settings["answer_tokens"])
+    parser.add_argument("--tool-rounds", type=int, default=settings["tool_rounds"])
+    parser.add_argument("--tool-name", default=settings["tool_name"])
+    args = parser.parse_args()
+
+    settings.update(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        token_delay_ms=args.token_delay_ms,
+        answer_tokens=args.answer_tokens,
+        tool_rounds=args.tool_rounds,
+        tool_name=args.tool_name,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from collections import defaultdict
+
+import httpx
+
+from benchmarks.samples import BACKEND_DIR, load_sample_queries, load_replay
+from benchmarks.stats import summarize, print_report, write_report
+
+BENCH_PASSWORD = "bench-password"
+
+ENDPOINT_LABELS = {
+    "ask": "POST /chat/ask",
+    "signin": "POST /auth/signin",
+    "sessions": "GET /chat/sessions/{user_uuid}/details",
+    "messages": "GET /chat/messages/{user_uuid}/{chat_id}",
+}
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINT_LABELS:
+            raise ValueError(f"Unknown endpoint in mix: {name}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def seed_database(database_url: str, users: int, chats_per_user: int, messages_per_chat: int) -> list[dict]:
+    os.environ["DATABASE_URL"] = database_url
+    from core.db import Base, engine, SessionLocal
+    from core.security import hash_password
+    from models import User, ChatSession, ChatMessage
+
+    Base.metadata.create_all(bind=engine)
+    password_hash = hash_password(BENCH_PASSWORD)
+    db = SessionLocal()
+    try:
+        seeded = []
+        for i in range(users):
+            student_id = f"9{i:08d}"
+            user = db.query(User).filter(User.student_id == student_id).first()
+            if not user:
+                user = User(
+                    student_id=student_id,
+                    email=f"bench{i}@example.com",
+                    password_hash=password_hash,
+                    is_verified=True)
+                db.add(user)
+                db.flush()
+                for _ in range(chats_per_user):
+                    session = ChatSession(user_uuid=user.uuid, title="bench")
+                    db.add(session)
+                    db.flush()
+                    for j in range(messages_per_chat):
+                        db.add(ChatMessage(
+                            chat_id=session.chat_id,
+                            role="user" if j % 2 == 0 else "assistant",
+                            content=f"bench message {j}"))
+            chat_ids = [
+                row.chat_id
+                for row in db.query(ChatSession.chat_id).filter(ChatSession.user_uuid == user.uuid).all()]
+            seeded.append({"student_id": student_id, "uuid": str(user.uuid), "chat_ids": [str(c) for c in chat_ids]})
+        db.commit()
+        return seeded
+    finally:
+        db.close()
+
+
+def wait_until_ready(url: str, process: subprocess.Popen, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process serving {url} exited with code {process.returncode}")
+        try:
+            if httpx.get(url, timeout=2.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"{url} did not become ready in {timeout:.0f}s")
+
+
+def start_fake_llm(args) -> subprocess.Popen:
+    command = [
+        sys.executable, "-m", "benchmarks.fake_llm_server",
+        "--port", str(args.llm_port),
+        "--latency-ms", str(args.llm_latency_ms),
+        "--jitter-ms", str(args.llm_jitter_ms),
+        "--token-delay-ms", str(args.llm_token_delay_ms),
+        "--tool-rounds", str(args.llm_tool_rounds),
+    ]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR)
+    wait_until_ready(f"http://127.0.0.1:{args.llm_port}/health", process, 30)
+    return process
+
+
+def start_app(args) -> subprocess.Popen:
+    from core.config import CONFIG_PATH
+
+    with open(BACKEND_DIR / CONFIG_PATH, "r", encoding="utf-8") as f:
+        bench_config = json.load(f)
+    bench_config["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.llm_port}"
+    bench_config["GROQ_API_KEY"] = "bench"
+    if args.model_path:
+        bench_config["EMBEDDING_MODEL_PATH"] = args.model_path
+    if args.cache_backend:
+        bench_config["CACHE_BACKEND"] = args.cache_backend
+
+    config_file = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8")
+    json.dump(bench_config, config_file, ensure_ascii=False)
+    config_file.close()
+
+    env = dict(os.environ, APP_CONFIG_PATH=config_file.name, DATABASE_URL=args.database_url)
+    command = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--port", str(args.app_port),
+        "--workers", str(args.workers),
+        "--log-level", "warning",
+    ]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+    wait_until_ready(f"http://127.0.0.1:{args.app_port}/openapi.json", process, args.startup_timeout)
+    return process
+
+
+def build_plan(args, users: list[dict]) -> list[dict]:
+    rng = random.Random(args.seed)
+    if args.replay:
+        entries = load_replay(args.replay)
+        if not entries:
+            raise ValueError(f"No replayable entries in {args.replay}")
+        plan = [dict(entries[i % len(entries)]) for i in range(args.requests)]
+    else:
+        weights = parse_mix(args.mix)
+        names = list(weights)
+        plan = [{"endpoint": name} for name in rng.choices(names, weights=[weights[n] for n in names], k=args.requests)]
+
+    queries = load_sample_queries(include_faq=args.faq)
+    for item in plan:
+        item["user"] = rng.choice(users)
+        if item["endpoint"] == "ask" and not item.get("message"):
+            item["message"] = rng.choice(queries)
+        item["continue_chat"] = rng.random() < 0.5
+        item["chat_id"] = rng.choice(item["user"]["chat_ids"]) if item["user"]["chat_ids"] else None
+    return plan
+
+
+async def send(client: httpx.AsyncClient, item: dict) -> httpx.Response:
+    user = item["user"]
+    endpoint = item["endpoint"]
+    if endpoint == "ask":
+        payload = {"user_uuid": user["uuid"], "message": item["message"]}
+        if item["continue_chat"] and item["chat_id"]:
+            payload["chat_id"] = item["chat_id"]
+        return await client.post("/chat/ask", json=payload)
+    if endpoint == "signin":
+        return await client.post("/auth/signin", json={"student_id": user["student_id"], "password": BENCH_PASSWORD})
+    if endpoint == "sessions":
+        return await client.get(f"/chat/sessions/{user['uuid']}/details")
+    if endpoint == "messages":
+        if not item["chat_id"]:
+            return await client.get(f"/chat/sessions/{user['uuid']}/details")
+        return await client.get(f"/chat/messages/{user['uuid']}/{item['chat_id']}")
+    raise ValueError(f"Unknown endpoint: {endpoint}")
+
+
+async def run_load(base_url: str, plan: list[dict], concurrency: int, timeout: float) -> dict:
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    statuses = defaultdict(lambda: defaultdict(int))
+    queue = asyncio.Queue()
+    for item in plan:
+        queue.put_nowait(item)
+
+    async def worker(client: httpx.AsyncClient):
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            label = ENDPOINT_LABELS[item["endpoint"]]
+            start = time.perf_counter()
+            try:
+                response = await send(client, item)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if item["endpoint"] == "ask" and status == 200:
+                # FAQ answers skip the LLM entirely, so keep them out of the agent numbers.
+                label = f"{label} [{response.json().get('source', 'agent')}]"
+            statuses[label][str(status)] += 1
+            if status == 200:
+                latencies[label].append(elapsed_ms)
+            else:
+                errors[label] += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        wall_seconds = time.perf_counter() - start
+
+    labels = sorted(set(latencies) | set(errors))
+    endpoints = {label: summarize(latencies[label], wall_seconds, errors[label]) for label in labels}
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "wall_seconds": wall_seconds,
+        "endpoints": endpoints,
+        "total": summarize(all_latencies, wall_seconds, sum(errors.values())),
+        "statuses": {label: dict(codes) for label, codes in statuses.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the backend against local stand-ins")
+    parser.add_argument("--app-url", help="Benchmark an already running app instead of starting one")
+    parser.add_argument("--app-port", type=int, default=8900)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--startup-timeout", type=float, default=300)
+    parser.add_argument(
+        "--database-url",
+        help="Database seeded with the benchmark users (default: a local SQLite file); "
+             "required with --app-url and must be the database that app uses")
+    parser.add_argument("--model-path", help="Override EMBEDDING_MODEL_PATH for the app under test")
+    parser.add_argument("--cache-backend", choices=["memory", "redis", "none"], help="Override CACHE_BACKEND for the app under test")
+    parser.add_argument("--llm-port", type=int, default=8901)
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--llm-jitter-ms", type=float, default=200)
+    parser.add_argument("--llm-token-delay-ms", type=float, default=15)
+    parser.add_argument("--llm-tool-rounds", type=int, default=1)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--chats-per-user", type=int, default=3)
+    parser.add_argument("--messages-per-chat", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--mix", default="ask=2,signin=1,sessions=3,messages=3")
+    parser.add_argument(
+        "--faq",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Also ask the curated FAQ questions (answered without the LLM)")
+    parser.add_argument("--replay", help="JSONL file of {endpoint, message} entries to replay")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args()
+    if args.app_url and not args.database_url:
+        parser.error("--app-url needs --database-url pointing at the database of that app")
+    args.database_url = args.database_url or f"sqlite:///{BACKEND_DIR / 'bench.db'}"
+
+    users = seed_database(args.database_url, args.users, args.chats_per_user, args.messages_per_chat)
+    plan = build_plan(args, users)
+
+    processes = []
+    try:
+        if args.app_url:
+            base_url = args.app_url
+        else:
+            processes.append(start_fake_llm(args))
+            processes.append(start_app(args))
+            base_url = f"http://127.0.0.1:{args.app_port}"
+        report = asyncio.run(run_load(base_url, plan, args.concurrency, args.timeout))
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait(timeout=30)
+
+    report["settings"] = {key: value for key, value in vars(args).items()}
+    print_report(
+        f"Load test: {args.requests} requests, concurrency {args.concurrency}, {report['wall_seconds']:.1f}s",
+        dict(report["endpoints"], total=report["total"]))
+    if args.output:
+        write_report(args.output, report)
+
+
+if __name__ == "__main__":
+    main()
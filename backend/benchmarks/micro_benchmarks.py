@@ -0,0 +1,74 @@
+import os
+import time
+import argparse
+
+from benchmarks.samples import BACKEND_DIR, load_sample_queries
+from benchmarks.stats import summarize, print_report, write_report
+
+FAISS_INDEXES = ["bachelor", "postgraduate", "international", "ostads"]
+
+
+def measure(fn, inputs: list, iterations: int, warmup: int) -> dict:
+    for i in range(warmup):
+        fn(inputs[i % len(inputs)])
+    latencies = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        call_start = time.perf_counter()
+        fn(inputs[i % len(inputs)])
+        latencies.append((time.perf_counter() - call_start) * 1000)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def bench_retrievers(model_path: str, top_k: int, queries: list[str], iterations: int, warmup: int) -> dict:
+    from utils.retrieval_module import FaissRetriever
+
+    results = {}
+    for name in FAISS_INDEXES:
+        retriever = FaissRetriever(
+            faiss_path=os.path.join("vectordb", f"{name}_faiss_index"),
+            model_path=model_path)
+        results[f"FaissRetriever.search[{name}]"] = measure(
+            lambda query: retriever.search(query, top_k=top_k), queries, iterations, warmup)
+        results[f"FaissRetriever._embed_query[{name}]"] = measure(
+            retriever._embed_query, queries, iterations, warmup)
+    return results
+
+
+def bench_token_counter(checkpoint: str, texts: list[str], iterations: int, warmup: int) -> dict:
+    from utils.token_counter_module import TokenCounter
+
+    counter = TokenCounter(checkpoint)
+    return {"TokenCounter.count_tokens": measure(counter.count_tokens, texts, iterations, warmup)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for retrieval and token counting")
+    parser.add_argument("--model-path", default=None, help="Defaults to EMBEDDING_MODEL_PATH from the config")
+    parser.add_argument("--tokenizer", default=None, help="Tokenizer checkpoint, defaults to the embedding model")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--only", choices=["retriever", "tokens"])
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    from core.config import config
+
+    model_path = args.model_path or config["EMBEDDING_MODEL_PATH"]
+    queries = load_sample_queries()
+
+    results = {}
+    if args.only in (None, "retriever"):
+        results.update(bench_retrievers(model_path, args.top_k, queries, args.iterations, args.warmup))
+    if args.only in (None, "tokens"):
+        results.update(bench_token_counter(args.tokenizer or model_path, queries, args.iterations, args.warmup))
+
+    print_report(f"Microbenchmarks: {args.iterations} iterations per case", results)
+    if args.output:
+        write_report(args.output, {"settings": vars(args), "results": results})
+
+
+if __name__ == "__main__":
+    main()
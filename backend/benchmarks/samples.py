@@ -0,0 +1,65 @@
+import json
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = BACKEND_DIR.parent / "data"
+
+# Questions that are not in any FAQ file, so they exercise the agent / LLM path.
+AGENT_QUERIES = [
+    "کارآموزی دانشجویان کارشناسی در چه ترمی انجام می شود؟",
+    "پروژه کارشناسی چند واحد است و چه زمانی باید اخذ شود؟",
+    "حداکثر سنوات مقطع کارشناسی ارشد چند نیمسال است؟",
+    "How can international students apply for a PhD program?",
+    "زمینه پژوهشی اساتید دانشکده کامپیوتر چیست؟",
+    "دانشجوی کارشناسی در هر نیمسال حداقل چند واحد باید بگیرد؟",
+    "شرایط مهمانی در دانشگاه دیگر برای دانشجویان کارشناسی چیست؟",
+    "دوره های کهاد چه مزیتی برای دانشجویان دارند؟",
+    "What documents do international applicants need for a master's admission?",
+    "Is there a Persian language course for international students?",
+    "کدام استاد دانشکده برق در زمینه یادگیری ماشین فعالیت می کند؟",
+    "ایمیل و اتاق اساتید گروه مخابرات را از کجا پیدا کنم؟",
+    "شرایط تغییر رشته در مقطع کارشناسی چیست؟",
+    "معدل لازم برای برداشتن بیش از ۲۰ واحد چقدر است؟",
+]
+
+
+def load_faq_questions(data_dir: Path = DATA_DIR) -> list[str]:
+    path = data_dir / "tahsilat_takmili" / "tahsilat_takmili_FAQ.txt"
+    if not path.exists():
+        return []
+    questions = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line.startswith("- ") and line.endswith((":", "؟", "?")):
+            questions.append(line[2:].rstrip(":").strip())
+    return questions
+
+
+def load_chunks(data_dir: Path = DATA_DIR) -> list[str]:
+    chunks = []
+    for path in sorted(data_dir.glob("*/*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        chunks.extend(item["chunk"] for item in data if "chunk" in item)
+    return chunks
+
+
+def load_sample_queries(data_dir: Path = DATA_DIR, include_faq: bool = True) -> list[str]:
+    if not include_faq:
+        return list(AGENT_QUERIES)
+    return load_faq_questions(data_dir) + AGENT_QUERIES
+
+
+def load_replay(path: str) -> list[dict]:
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            message = entry.get("message") or entry.get("query")
+            endpoint = entry.get("endpoint", "ask" if message else None)
+            if endpoint:
+                entries.append({"endpoint": endpoint, "message": message})
+    return entries
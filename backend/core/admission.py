@@ -0,0 +1,246 @@
+import math
+import time
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from core.config import config
+
+BUCKET_PRUNE_THRESHOLD = 10000
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available, without consuming one."""
+        tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+    def take(self, now: float) -> float:
+        """Consume one token, or return how many seconds until one is available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def is_full(self, now: float) -> bool:
+        return self.tokens + (now - self.updated_at) * self.rate >= self.burst
+
+
+class Ticket:
+    __slots__ = ("user_uuid", "enqueued_at", "granted")
+
+    def __init__(self, user_uuid: str, enqueued_at: float):
+        self.user_uuid = user_uuid
+        self.enqueued_at = enqueued_at
+        self.granted = False
+
+
+class AdmissionController:
+    """Bounded, round-robin fair queue in front of the agent with per-user limits.
+
+    Each user has its own FIFO; free slots are granted by cycling over users that
+    have waiting requests, so one busy user cannot starve the others. Requests are
+    rejected up front when the user is over its limits, the queue is full, or the
+    estimated wait for the new request exceeds max_wait_seconds.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        per_user_concurrency: int,
+        per_user_rate: float,
+        per_user_burst: float,
+        max_wait_seconds: float,
+        initial_service_seconds: float = 5.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.per_user_concurrency = per_user_concurrency
+        self.per_user_rate = per_user_rate
+        self.per_user_burst = per_user_burst
+        self.max_wait_seconds = max_wait_seconds
+
+        self._cond = threading.Condition()
+        self._queues: OrderedDict[str, deque] = OrderedDict()
+        self._queued = 0
+        self._active = 0
+        self._in_flight: dict[str, int] = {}
+        self._buckets: dict[str, TokenBucket] = {}
+
+        self._service_seconds = initial_service_seconds
+        self._wait_seconds = 0.0
+        self._max_observed_wait = 0.0
+        self._admitted = 0
+        self._admitted_direct = 0
+        self._rejected: dict[str, int] = {}
+
+    def _estimated_wait(self, user_uuid: str) -> float:
+        if self._active < self.max_concurrency and self._queued == 0:
+            return 0.0
+        own = len(self._queues.get(user_uuid, ()))
+        ahead = sum(min(len(q), own + 1) for user, q in self._queues.items() if user != user_uuid) + own
+        rounds = (ahead + 1) / self.max_concurrency
+        return rounds * self._service_seconds
+
+    def _reject(self, reason: str, retry_after: float):
+        self._rejected[reason] = self._rejected.get(reason, 0) + 1
+        raise AdmissionRejected(reason, retry_after)
+
+    def _dispatch(self):
+        while self._active < self.max_concurrency and self._queues:
+            user_uuid, queue = next(iter(self._queues.items()))
+            ticket = queue.popleft()
+            if queue:
+                self._queues.move_to_end(user_uuid)
+            else:
+                del self._queues[user_uuid]
+            self._queued -= 1
+            self._active += 1
+            ticket.granted = True
+        self._cond.notify_all()
+
+    def _check_user(self, user_uuid: str, now: float) -> TokenBucket:
+        if self._in_flight.get(user_uuid, 0) >= self.per_user_concurrency:
+            self._reject("user_concurrency", self._service_seconds)
+
+        bucket = self._buckets.get(user_uuid)
+        if bucket is None:
+            if len(self._buckets) >= BUCKET_PRUNE_THRESHOLD:
+                self._prune_buckets(now)
+            bucket = self._buckets[user_uuid] = TokenBucket(self.per_user_rate, self.per_user_burst)
+        wait_for_token = bucket.wait_time(now)
+        if wait_for_token > 0:
+            self._reject("user_rate", wait_for_token)
+        return bucket
+
+    def check_user(self, user_uuid: str):
+        """Raise AdmissionRejected if the user is over its limits, without consuming anything."""
+        with self._cond:
+            self._check_user(user_uuid, time.monotonic())
+
+    def _enqueue(self, user_uuid: str) -> Ticket:
+        now = time.monotonic()
+        with self._cond:
+            bucket = self._check_user(user_uuid, now)
+
+            # Capacity rejections must not cost the user a rate token, so take it only after them.
+            can_start_now = self._active < self.max_concurrency and self._queued == 0
+            if not can_start_now and self._queued >= self.max_queue:
+                self._reject("queue_full", self._estimated_wait(user_uuid))
+            estimated_wait = self._estimated_wait(user_uuid)
+            if estimated_wait > self.max_wait_seconds:
+                self._reject("deadline", estimated_wait - self.max_wait_seconds)
+            bucket.take(now)
+
+            ticket = Ticket(user_uuid, now)
+            self._queues.setdefault(user_uuid, deque()).append(ticket)
+            self._queued += 1
+            self._in_flight[user_uuid] = self._in_flight.get(user_uuid, 0) + 1
+            self._dispatch()
+            return ticket
+
+    def _prune_buckets(self, now: float):
+        for user_uuid, bucket in list(self._buckets.items()):
+            if user_uuid not in self._in_flight and bucket.is_full(now):
+                del self._buckets[user_uuid]
+
+    def _finish(self, user_uuid: str):
+        remaining = self._in_flight.get(user_uuid, 1) - 1
+        if remaining:
+            self._in_flight[user_uuid] = remaining
+        else:
+            self._in_flight.pop(user_uuid, None)
+        self._dispatch()
+
+    def _withdraw(self, ticket: Ticket):
+        queue = self._queues.get(ticket.user_uuid)
+        if queue is not None:
+            queue.remove(ticket)
+            self._queued -= 1
+            if not queue:
+                del self._queues[ticket.user_uuid]
+        self._finish(ticket.user_uuid)
+
+    def _release(self, ticket: Ticket, started_at: float):
+        with self._cond:
+            self._active -= 1
+            self._service_seconds = 0.8 * self._service_seconds + 0.2 * (time.monotonic() - started_at)
+            self._finish(ticket.user_uuid)
+
+    @contextmanager
+    def admit(self, user_uuid: str):
+        ticket = self._enqueue(user_uuid)
+        with self._cond:
+            if not self._cond.wait_for(lambda: ticket.granted, timeout=self.max_wait_seconds):
+                self._withdraw(ticket)
+                self._rejected["timeout"] = self._rejected.get("timeout", 0) + 1
+                raise AdmissionRejected("timeout", self._service_seconds)
+            started_at = time.monotonic()
+            waited = started_at - ticket.enqueued_at
+            self._wait_seconds = 0.8 * self._wait_seconds + 0.2 * waited
+            self._max_observed_wait = max(self._max_observed_wait, waited)
+            self._admitted += 1
+        try:
+            yield waited
+        finally:
+            self._release(ticket, started_at)
+
+    @contextmanager
+    def admit_user(self, user_uuid: str):
+        """Apply only the per-user limits, for cheap requests that skip the global queue."""
+        now = time.monotonic()
+        with self._cond:
+            self._check_user(user_uuid, now).take(now)
+            self._in_flight[user_uuid] = self._in_flight.get(user_uuid, 0) + 1
+            self._admitted_direct += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._finish(user_uuid)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "queue_depth": self._queued,
+                "active": self._active,
+                "queued_users": len(self._queues),
+                "in_flight_users": len(self._in_flight),
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "avg_wait_seconds": round(self._wait_seconds, 4),
+                "max_wait_seconds_observed": round(self._max_observed_wait, 4),
+                "avg_service_seconds": round(self._service_seconds, 4),
+                "admitted_total": self._admitted,
+                "admitted_direct_total": self._admitted_direct,
+                "rejected_total": dict(self._rejected),
+            }
+
+
+admission_controller = AdmissionController(
+    max_concurrency=config["ADMISSION_MAX_CONCURRENCY"],
+    max_queue=config["ADMISSION_MAX_QUEUE"],
+    per_user_concurrency=config["ADMISSION_PER_USER_CONCURRENCY"],
+    per_user_rate=config["ADMISSION_PER_USER_RATE_PER_SECOND"],
+    per_user_burst=config["ADMISSION_PER_USER_BURST"],
+    max_wait_seconds=config["ADMISSION_MAX_WAIT_SECONDS"])
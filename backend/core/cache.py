@@ -0,0 +1,385 @@
+import json
+import uuid
+import time
+import threading
+from collections import OrderedDict
+
+from core.config import config
+
+SESSIONS_FIELD = "sessions"
+VERSION_FIELD = "_v"
+REDIS_UPDATE_ATTEMPTS = 3
+# Deleted users stay blocked long enough to outlive any /chat/ask that was in flight.
+TOMBSTONE_SECONDS = 600
+
+
+def messages_field(chat_id: str) -> str:
+    # Postgres accepts any spelling of a UUID, so key on the canonical one.
+    try:
+        chat_id = str(uuid.UUID(chat_id))
+    except ValueError:
+        pass
+    return f"messages:{chat_id}"
+
+
+def item_count(value) -> int:
+    if isinstance(value, list):
+        return len(value)
+    return len(value["messages"])
+
+
+def message_order(message: dict):
+    return message["created_at"], message["id"]
+
+
+def public_message(message: dict) -> dict:
+    return {"role": message["role"], "content": message["content"], "created_at": message["created_at"]}
+
+
+class NullCacheBackend:
+    name = "none"
+
+    def get(self, user_uuid: str, field: str):
+        return None
+
+    def version(self, user_uuid: str) -> int:
+        return 0
+
+    def fill(self, user_uuid: str, field: str, value, version: int) -> bool:
+        return False
+
+    def update(self, user_uuid: str, field: str, apply):
+        pass
+
+    def invalidate(self, user_uuid: str):
+        pass
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryCacheBackend:
+    """Per-process LRU of user records, bounded by the number of cached sessions and messages.
+
+    Each record holds a version that every write replaces with a new, never reused
+    number, so fill() can tell whether anything changed since a reader looked. Users
+    without a record report the watermark, the newest version at the last eviction,
+    so evicting a record cannot make an older reader's version look current again.
+    Invalidated users get a tombstone that blocks any new entry for TOMBSTONE_SECONDS.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_items: int, max_fields_per_user: int):
+        self.max_items = max_items
+        self.max_fields_per_user = max_fields_per_user
+        self._lock = threading.Lock()
+        self._records: OrderedDict[str, dict] = OrderedDict()
+        self._tombstones: OrderedDict[str, float] = OrderedDict()
+        self._last_version = 0
+        self._watermark = 0
+        self._items = 0
+        self._evictions = 0
+
+    def _next_version(self) -> int:
+        self._last_version += 1
+        return self._last_version
+
+    def _version(self, user_uuid: str) -> int:
+        record = self._records.get(user_uuid)
+        return record["version"] if record else self._watermark
+
+    def _is_deleted(self, user_uuid: str) -> bool:
+        now = time.monotonic()
+        while self._tombstones:
+            oldest, deleted_at = next(iter(self._tombstones.items()))
+            if now - deleted_at < TOMBSTONE_SECONDS:
+                break
+            del self._tombstones[oldest]
+        return user_uuid in self._tombstones
+
+    def _record(self, user_uuid: str) -> dict:
+        record = self._records.get(user_uuid)
+        if record is None:
+            record = self._records[user_uuid] = {"version": self._watermark, "fields": OrderedDict()}
+            self._items += 1
+        else:
+            self._records.move_to_end(user_uuid)
+        return record
+
+    def _store(self, record: dict, field: str, value):
+        fields = record["fields"]
+        old = fields.pop(field, None)
+        if old is not None:
+            self._items -= item_count(old)
+        if value is not None:
+            fields[field] = value
+            self._items += item_count(value)
+            while len(fields) > self.max_fields_per_user:
+                _, dropped = fields.popitem(last=False)
+                self._items -= item_count(dropped)
+
+        # The record just written is the most recently used one, so it is evicted last.
+        while self._items > self.max_items and len(self._records) > 1:
+            _, evicted = self._records.popitem(last=False)
+            self._items -= 1 + sum(item_count(v) for v in evicted["fields"].values())
+            self._evictions += 1
+            self._watermark = self._last_version
+
+    def get(self, user_uuid: str, field: str):
+        with self._lock:
+            record = self._records.get(user_uuid)
+            if record is None or field not in record["fields"]:
+                return None
+            self._records.move_to_end(user_uuid)
+            record["fields"].move_to_end(field)
+            return record["fields"][field]
+
+    def version(self, user_uuid: str) -> int:
+        with self._lock:
+            return self._version(user_uuid)
+
+    def fill(self, user_uuid: str, field: str, value, version: int) -> bool:
+        with self._lock:
+            if self._version(user_uuid) != version or self._is_deleted(user_uuid):
+                return False
+            self._store(self._record(user_uuid), field, value)
+            return True
+
+    def update(self, user_uuid: str, field: str, apply):
+        with self._lock:
+            record = self._record(user_uuid)
+            record["version"] = self._next_version()
+            if not self._is_deleted(user_uuid):
+                self._store(record, field, apply(record["fields"].get(field)))
+
+    def invalidate(self, user_uuid: str):
+        with self._lock:
+            record = self._record(user_uuid)
+            record["version"] = self._next_version()
+            for value in record["fields"].values():
+                self._items -= item_count(value)
+            record["fields"].clear()
+            self._tombstones[user_uuid] = time.monotonic()
+            self._tombstones.move_to_end(user_uuid)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "users": len(self._records),
+                "items": self._items,
+                "max_items": self.max_items,
+                "evictions": self._evictions,
+                "tombstones": len(self._tombstones),
+            }
+
+
+class RedisCacheBackend:
+    """Shared backend: one hash per user with the same version protocol as MemoryCacheBackend.
+
+    Memory is bounded by the per-user TTL. A hash that disappears early reports
+    version 0 again, so the server must not evict these keys before their TTL
+    (maxmemory-policy noeviction, or volatile-ttl with ample headroom).
+    """
+
+    name = "redis"
+
+    BUMP_VERSION = """
+        redis.call('HSET', KEYS[1], ARGV[1], redis.call('INCR', KEYS[2]))
+        redis.call('EXPIRE', KEYS[1], ARGV[2])
+    """
+    INVALIDATE = """
+        local version = redis.call('INCR', KEYS[2])
+        redis.call('DEL', KEYS[1])
+        redis.call('HSET', KEYS[1], ARGV[1], version)
+        redis.call('EXPIRE', KEYS[1], ARGV[2])
+        redis.call('SET', KEYS[3], 1, 'EX', ARGV[3])
+    """
+    FILL = """
+        if (redis.call('HGET', KEYS[1], ARGV[1]) or '0') ~= ARGV[2] or redis.call('EXISTS', KEYS[2]) == 1 then
+            return 0
+        end
+        redis.call('HSET', KEYS[1], ARGV[3], ARGV[4])
+        redis.call('EXPIRE', KEYS[1], ARGV[5])
+        return 1
+    """
+
+    def __init__(self, url: str, ttl_seconds: int, prefix: str = "chat_cache"):
+        import redis
+        from redis.exceptions import WatchError
+
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self.version_key = f"{prefix}:version"
+        self._watch_error = WatchError
+        self._bump_version = self.client.register_script(self.BUMP_VERSION)
+        self._invalidate = self.client.register_script(self.INVALIDATE)
+        self._fill = self.client.register_script(self.FILL)
+
+    def _key(self, user_uuid: str) -> str:
+        return f"{self.prefix}:user:{user_uuid}"
+
+    def _tombstone_key(self, user_uuid: str) -> str:
+        return f"{self.prefix}:deleted:{user_uuid}"
+
+    def get(self, user_uuid: str, field: str):
+        raw = self.client.hget(self._key(user_uuid), field)
+        return json.loads(raw) if raw is not None else None
+
+    def version(self, user_uuid: str) -> int:
+        return int(self.client.hget(self._key(user_uuid), VERSION_FIELD) or 0)
+
+    def fill(self, user_uuid: str, field: str, value, version: int) -> bool:
+        return bool(self._fill(
+            keys=[self._key(user_uuid), self._tombstone_key(user_uuid)],
+            args=[VERSION_FIELD, str(version), field, json.dumps(value, ensure_ascii=False), self.ttl_seconds]))
+
+    def update(self, user_uuid: str, field: str, apply):
+        key = self._key(user_uuid)
+        tombstone_key = self._tombstone_key(user_uuid)
+        self._bump_version(keys=[key, self.version_key], args=[VERSION_FIELD, self.ttl_seconds])
+        with self.client.pipeline() as pipe:
+            for _ in range(REDIS_UPDATE_ATTEMPTS):
+                try:
+                    pipe.watch(key, tombstone_key)
+                    if pipe.exists(tombstone_key):
+                        pipe.unwatch()
+                        return
+                    raw = pipe.hget(key, field)
+                    value = apply(json.loads(raw) if raw is not None else None)
+                    if raw is None and value is None:
+                        pipe.unwatch()
+                        return
+                    pipe.multi()
+                    if value is None:
+                        pipe.hdel(key, field)
+                    else:
+                        pipe.hset(key, field, json.dumps(value, ensure_ascii=False))
+                        pipe.expire(key, self.ttl_seconds)
+                    pipe.execute()
+                    return
+                except self._watch_error:
+                    continue
+        # Lost the race repeatedly: drop the entry rather than leave it stale.
+        self.client.hdel(key, field)
+
+    def invalidate(self, user_uuid: str):
+        self._invalidate(
+            keys=[self._key(user_uuid), self.version_key, self._tombstone_key(user_uuid)],
+            args=[VERSION_FIELD, self.ttl_seconds, TOMBSTONE_SECONDS])
+
+    def stats(self) -> dict:
+        return {"ttl_seconds": self.ttl_seconds}
+
+
+class ChatCache:
+    """Write-through cache of each user's session list and the newest messages of their chats.
+
+    Readers take version() before querying the database and store the result with the
+    fill_* methods, which do nothing if a write or an invalidation for the user happened
+    in between. Writers go through update(), which always bumps the version and only
+    changes entries that are already cached (or creates the entry of a brand new chat).
+    After invalidate_user() no entry is stored for the user for TOMBSTONE_SECONDS, so a
+    request still in flight when the account was deleted cannot bring the entry back.
+    Cached values are replaced, never mutated, because readers may still hold them.
+    """
+
+    def __init__(self, backend, message_tail: int):
+        self.backend = backend
+        self.message_tail = message_tail
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    def _tail(self, messages: list[dict], complete: bool) -> dict:
+        if len(messages) > self.message_tail:
+            return {"complete": False, "messages": messages[-self.message_tail:]}
+        return {"complete": complete, "messages": messages}
+
+    def version(self, user_uuid: str) -> int:
+        return self.backend.version(user_uuid)
+
+    def sessions(self, user_uuid: str):
+        sessions = self.backend.get(user_uuid, SESSIONS_FIELD)
+        self._count(sessions is not None)
+        return sessions
+
+    def messages(self, user_uuid: str, chat_id: str, limit: int = None):
+        """Cached history of a chat (the newest `limit` messages if given), or None on a miss."""
+        entry = self.backend.get(user_uuid, messages_field(chat_id))
+        messages = None
+        if entry is not None:
+            if limit is not None and len(entry["messages"]) >= limit:
+                messages = entry["messages"][-limit:]
+            elif entry["complete"]:
+                messages = entry["messages"]
+        self._count(messages is not None)
+        return None if messages is None else [public_message(m) for m in messages]
+
+    def fill_sessions(self, user_uuid: str, sessions: list[dict], version: int):
+        self.backend.fill(user_uuid, SESSIONS_FIELD, sessions, version)
+
+    def fill_messages(self, user_uuid: str, chat_id: str, messages: list[dict], complete: bool, version: int):
+        self.backend.fill(user_uuid, messages_field(chat_id), self._tail(messages, complete), version)
+
+    def add_session(self, user_uuid: str, session: dict):
+        def apply(sessions):
+            if sessions is None:
+                return None
+            return [session] + [s for s in sessions if s["chat_id"] != session["chat_id"]]
+
+        self.backend.update(user_uuid, SESSIONS_FIELD, apply)
+
+    def set_title(self, user_uuid: str, chat_id: str, title: str):
+        def apply(sessions):
+            if sessions is None:
+                return None
+            return [dict(s, title=title) if s["chat_id"] == chat_id else s for s in sessions]
+
+        self.backend.update(user_uuid, SESSIONS_FIELD, apply)
+
+    def add_messages(self, user_uuid: str, chat_id: str, messages: list[dict], new_chat: bool = False):
+        def apply(entry):
+            if entry is None:
+                return self._tail(messages, True) if new_chat else None
+            known = {m["id"] for m in entry["messages"]}
+            merged = entry["messages"] + [m for m in messages if m["id"] not in known]
+            return self._tail(sorted(merged, key=message_order), entry["complete"])
+
+        self.backend.update(user_uuid, messages_field(chat_id), apply)
+
+    def invalidate_user(self, user_uuid: str):
+        self.backend.invalidate(user_uuid)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses = self._hits, self._misses
+        return {
+            "backend": self.backend.name,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "message_tail": self.message_tail,
+            **self.backend.stats(),
+        }
+
+
+def create_cache_backend(name: str):
+    if name == "memory":
+        return MemoryCacheBackend(config["CACHE_MAX_ITEMS"], config["CACHE_MAX_CHATS_PER_USER"] + 1)
+    if name == "redis":
+        return RedisCacheBackend(config["CACHE_REDIS_URL"], config["CACHE_TTL_SECONDS"])
+    if name == "none":
+        return NullCacheBackend()
+    raise ValueError(f"Unknown cache backend: {name}")
+
+
+chat_cache = ChatCache(create_cache_backend(config["CACHE_BACKEND"]), config["CACHE_MESSAGE_TAIL"])
@@ -0,0 +1,7 @@
+import os
+import json
+
+CONFIG_PATH = os.getenv("APP_CONFIG_PATH", r"./config.json")
+
+with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+    config = json.load(f)
@@ -0,0 +1,260 @@
+import os
+import re
+import sys
+import json
+import time
+import itertools
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Optional
+
+from core.config import config
+from core.security import verify_admin_token
+
+REQUEST_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+current_profile: ContextVar[Optional["Profile"]] = ContextVar("current_profile", default=None)
+
+_frame_labels = {}
+
+
+def frame_label(code) -> str:
+    label = _frame_labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        roots = [root for root in (os.path.join(os.path.abspath(p), "") for p in sys.path) if filename.startswith(root)]
+        if roots:
+            filename = filename[len(max(roots, key=len)):]
+        label = _frame_labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+    return label
+
+
+def folded_stack(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def thread_cpu_clock(ident: int):
+    try:
+        return time.pthread_getcpuclockid(ident)
+    except (AttributeError, OSError):
+        return None
+
+
+class Profile:
+    """Wall-clock sampling of the threads working on one request.
+
+    Threads join through track() (see profiled / propagate). Every interval the
+    sampler folds each tracked thread's stack and files it under a `cpu` or `wait`
+    root frame depending on whether the thread's CPU clock advanced, so the
+    flamegraph separates compute from time spent blocked on the LLM or database.
+    """
+
+    def __init__(self, request_id: str, method: str, path: str, trigger: str, interval_seconds: float):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.interval_seconds = interval_seconds
+        self.started_at = datetime.now(timezone.utc)
+        self.samples = Counter()
+        self._threads = Counter()
+        self._cpu_clocks = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._start = time.perf_counter()
+        self.duration_ms = 0.0
+        self._sampler = threading.Thread(target=self._run, name=f"profiler-{request_id[:8]}", daemon=True)
+        self._sampler.start()
+
+    @contextmanager
+    def track(self):
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] += 1
+            if ident not in self._cpu_clocks:
+                clock = thread_cpu_clock(ident)
+                self._cpu_clocks[ident] = [clock, time.thread_time() if clock is not None else None]
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._threads[ident] -= 1
+                if not self._threads[ident]:
+                    del self._threads[ident]
+                    self._cpu_clocks.pop(ident, None)
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            self._sample()
+
+    def _sample(self):
+        frames = sys._current_frames()
+        with self._lock:
+            clocks = [(ident, self._cpu_clocks[ident]) for ident in self._threads]
+        for ident, clock in clocks:
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            state = "wall"
+            if clock[0] is not None:
+                try:
+                    cpu_time = time.clock_gettime(clock[0])
+                    state = "cpu" if cpu_time > clock[1] else "wait"
+                    clock[1] = cpu_time
+                except OSError:
+                    pass
+            self.samples[f"{state};{folded_stack(frame)}"] += 1
+
+    def stop(self):
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        self._stop.set()
+        self._sampler.join()
+
+
+def profiled(func):
+    """Sample the calling thread while func runs, if the current request is being profiled."""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = current_profile.get()
+        if profile is None:
+            return func(*args, **kwargs)
+        with profile.track():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def propagate(func):
+    """Bind func to the current profile before handing it to another thread's executor."""
+    profile = current_profile.get()
+    if profile is None:
+        return func
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = current_profile.set(profile)
+        try:
+            with profile.track():
+                return func(*args, **kwargs)
+        finally:
+            current_profile.reset(token)
+
+    return wrapper
+
+
+class RequestProfiler:
+    """Decides which requests to profile and keeps the newest profiles on disk.
+
+    A request is profiled when it is the n-th request to one of sample_paths, or when it
+    carries `X-Profile` together with a valid admin token. Each profile is written as
+    `<request_id>.folded` (flamegraph.pl / speedscope / inferno input) plus a JSON summary.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        sample_every_n: int,
+        sample_paths: list[str],
+        interval_seconds: float,
+        max_files: int,
+        max_concurrent: int,
+    ):
+        self.directory = directory
+        self.sample_every_n = sample_every_n
+        self.sample_paths = frozenset(sample_paths)
+        self.interval_seconds = interval_seconds
+        self.max_files = max_files
+        self.max_concurrent = max_concurrent
+        self._counter = itertools.count(1)
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def trigger_for(self, path: str, headers) -> Optional[str]:
+        if self.sample_every_n and path in self.sample_paths and next(self._counter) % self.sample_every_n == 0:
+            return "sampled"
+        if "x-profile" in headers and verify_admin_token(headers.get("x-admin-token")):
+            return "header"
+        return None
+
+    def start(self, request_id: str, method: str, path: str, trigger: str) -> Optional[Profile]:
+        with self._lock:
+            if self._active >= self.max_concurrent:
+                return None
+            self._active += 1
+        return Profile(request_id, method, path, trigger, self.interval_seconds)
+
+    def finish(self, profile: Profile, status_code: int):
+        profile.stop()
+        with self._lock:
+            self._active -= 1
+
+        os.makedirs(self.directory, exist_ok=True)
+        lines = [f"{stack} {count}\n" for stack, count in profile.samples.most_common()]
+        with open(self._path(profile.request_id, ".folded"), "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        summary = {
+            "request_id": profile.request_id,
+            "method": profile.method,
+            "path": profile.path,
+            "status_code": status_code,
+            "trigger": profile.trigger,
+            "started_at": profile.started_at.isoformat(),
+            "duration_ms": round(profile.duration_ms, 1),
+            "interval_ms": self.interval_seconds * 1000,
+            "samples": sum(profile.samples.values()),
+            "cpu_samples": sum(c for stack, c in profile.samples.items() if stack.startswith("cpu;")),
+        }
+        with open(self._path(profile.request_id, ".json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f)
+        self._prune()
+
+    def _path(self, request_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, request_id + suffix)
+
+    def _summaries(self) -> list[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        paths = [entry.path for entry in os.scandir(self.directory) if entry.name.endswith(".json")]
+        return sorted(paths, key=os.path.getmtime, reverse=True)
+
+    def _prune(self):
+        for path in self._summaries()[self.max_files:]:
+            for suffix in (".json", ".folded"):
+                try:
+                    os.remove(path[:-len(".json")] + suffix)
+                except FileNotFoundError:
+                    pass
+
+    def list(self) -> list[dict]:
+        profiles = []
+        for path in self._summaries():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    profiles.append(json.load(f))
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+        return profiles
+
+    def folded_path(self, request_id: str) -> Optional[str]:
+        if not REQUEST_ID_PATTERN.fullmatch(request_id):
+            return None
+        path = self._path(request_id, ".folded")
+        return path if os.path.exists(path) else None
+
+
+request_profiler = RequestProfiler(
+    directory=config["PROFILE_DIR"],
+    sample_every_n=config["PROFILE_SAMPLE_EVERY_N"],
+    sample_paths=config["PROFILE_SAMPLE_PATHS"],
+    interval_seconds=config["PROFILE_INTERVAL_MS"] / 1000,
+    max_files=config["PROFILE_MAX_FILES"],
+    max_concurrent=config["PROFILE_MAX_CONCURRENT"])
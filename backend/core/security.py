@@ -1,7 +1,10 @@
+import secrets
 from datetime import datetime, timedelta, timezone
 from jose import jwt
 from passlib.context import CryptContext
 
+from core.config import config
+
 SECRET_KEY = "change_this"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 2
@@ -23,4 +26,10 @@ def verify_password(password: str, password_hash: str) -> bool:
 def create_access_token(subject: str) -> str:
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode = {"sub": subject, "exp": expire}
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
\ No newline at end of file
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+def verify_admin_token(token: str) -> bool:
+    admin_token = config["ADMIN_TOKEN"]
+    if not admin_token or not token:
+        return False
+    return secrets.compare_digest(token.encode("utf-8"), admin_token.encode("utf-8"))
\ No newline at end of file
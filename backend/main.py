@@ -1,9 +1,11 @@
 import time
+import uuid
 import logging
 from fastapi import FastAPI, Request
+from starlette.concurrency import run_in_threadpool
 
-from core.db import Base, engine
-from routes import auth_router, chat_router
+from routes import auth_router, chat_router, metrics_router, admin_router
+from core.profiling import request_profiler, current_profile
 
 app = FastAPI()
 
@@ -14,20 +16,36 @@ logging.basicConfig(
 
 logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
 
-Base.metadata.create_all(bind=engine)
-
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     start_time = time.perf_counter()
-    response = await call_next(request)
+    profile = None
+    trigger = request_profiler.trigger_for(request.url.path, request.headers)
+    if trigger:
+        profile = request_profiler.start(uuid.uuid4().hex, request.method, request.url.path, trigger)
+    if profile is None:
+        response = await call_next(request)
+    else:
+        token = current_profile.set(profile)
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            response.headers["X-Request-ID"] = profile.request_id
+        finally:
+            current_profile.reset(token)
+            await run_in_threadpool(request_profiler.finish, profile, status_code)
     duration_ms = (time.perf_counter() - start_time) * 1000
     logger.info(
-        "%s %s -> %s (%.1fms)",
+        "%s %s -> %s (%.1fms)%s",
         request.method,
         request.url.path,
         response.status_code,
-        duration_ms)
+        duration_ms,
+        f" profile={profile.request_id}" if profile else "")
     return response
 
 app.include_router(auth_router)
-app.include_router(chat_router)
\ No newline at end of file
+app.include_router(chat_router)
+app.include_router(metrics_router)
+app.include_router(admin_router)
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""baseline schema, as created by Base.metadata.create_all before migrations
+
+Existing databases that were created by the app itself should be stamped with
+this revision (`alembic stamp 0001`) before running `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "user",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("uuid", sa.String(36), nullable=False),
+        sa.Column("student_id", sa.String(36), nullable=False),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("password_hash", sa.String(255), nullable=False),
+        sa.Column("is_verified", sa.Boolean),
+        sa.Column("otp_code", sa.String(10)),
+        sa.Column("otp_expires_at", sa.DateTime(timezone=True)),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_user_id", "user", ["id"])
+    op.create_index("ix_user_uuid", "user", ["uuid"], unique=True)
+    op.create_index("ix_user_student_id", "user", ["student_id"], unique=True)
+    op.create_index("ix_user_email", "user", ["email"], unique=True)
+
+    op.create_table(
+        "pending_user",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("student_id", sa.String(36), nullable=False),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("password_hash", sa.String(255), nullable=False),
+        sa.Column("otp_code", sa.String(10), nullable=False),
+        sa.Column("otp_expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_pending_user_id", "pending_user", ["id"])
+    op.create_index("ix_pending_user_student_id", "pending_user", ["student_id"], unique=True)
+    op.create_index("ix_pending_user_email", "pending_user", ["email"], unique=True)
+
+    op.create_table(
+        "chat_session",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("chat_id", sa.String(36), nullable=False),
+        sa.Column("user_uuid", sa.String(36), nullable=False),
+        sa.Column("title", sa.String(255)),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_chat_session_id", "chat_session", ["id"])
+    op.create_index("ix_chat_session_chat_id", "chat_session", ["chat_id"], unique=True)
+    op.create_index("ix_chat_session_user_uuid", "chat_session", ["user_uuid"])
+
+    op.create_table(
+        "chat_message",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("chat_id", sa.String(36), nullable=False),
+        sa.Column("user_uuid", sa.String(36), nullable=False),
+        sa.Column("role", sa.String(10), nullable=False),
+        sa.Column("content", sa.Text, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_chat_message_id", "chat_message", ["id"])
+    op.create_index("ix_chat_message_chat_id", "chat_message", ["chat_id"])
+    op.create_index("ix_chat_message_user_uuid", "chat_message", ["user_uuid"])
+
+
+def downgrade():
+    op.drop_table("chat_message")
+    op.drop_table("chat_session")
+    op.drop_table("pending_user")
+    op.drop_table("user")
@@ -0,0 +1,277 @@
+"""compact chat schema: native UUID ids, message -> session foreign key, composite indexes
+
+* chat_session is keyed by its uuid chat_id; the surrogate integer id is dropped.
+* chat_message.chat_id references chat_session.chat_id (ON DELETE CASCADE) and the
+  redundant chat_message.user_uuid column is dropped; ownership is checked on the session.
+* The single-column indexes are replaced by (user_uuid, created_at) on sessions and
+  (chat_id, created_at) on messages, which is what the history queries filter and sort by.
+* Messages whose chat_id has no session cannot satisfy the new foreign key and are deleted.
+
+On PostgreSQL chat_message can additionally be range-partitioned by month:
+
+    alembic -x partition_chat_message=monthly upgrade head
+
+Partitions are named chat_message_yYYYYmMM. Run `SELECT ensure_chat_message_partitions(3);`
+periodically (e.g. daily from cron) to keep three months of partitions ahead so the default
+partition stays empty. Old months are archived with
+`ALTER TABLE chat_message DETACH PARTITION chat_message_y2024m01;` and a dump/drop of that table.
+
+Column type changes rewrite the tables, so run this in a maintenance window on large databases.
+Other dialects (the SQLite files used for local benchmarks) are rebuilt in Python.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from datetime import datetime, timezone
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION ensure_chat_message_partitions(months_ahead integer, start_month date DEFAULT now()::date)
+RETURNS void AS $$
+DECLARE
+    month date := date_trunc('month', start_month)::date;
+    last_month date := (date_trunc('month', now()) + make_interval(months => months_ahead))::date;
+BEGIN
+    WHILE month <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF chat_message FOR VALUES FROM (%L) TO (%L)',
+            'chat_message_y' || to_char(month, 'YYYY') || 'm' || to_char(month, 'MM'),
+            month,
+            (month + interval '1 month')::date);
+        month := (month + interval '1 month')::date;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def partitioning_requested() -> bool:
+    return context.get_x_argument(as_dictionary=True).get("partition_chat_message") == "monthly"
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        upgrade_postgresql(partitioned=partitioning_requested())
+    else:
+        rebuild_generic(compact=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        downgrade_postgresql()
+    else:
+        rebuild_generic(compact=False)
+
+
+def upgrade_postgresql(partitioned: bool):
+    op.execute("""
+        DELETE FROM chat_message m
+        WHERE NOT EXISTS (SELECT 1 FROM chat_session s WHERE s.chat_id = m.chat_id)
+    """)
+    op.execute("UPDATE chat_session SET created_at = now() WHERE created_at IS NULL")
+    op.execute("UPDATE chat_message SET created_at = now() WHERE created_at IS NULL")
+
+    op.drop_index("ix_chat_session_id", table_name="chat_session")
+    op.drop_index("ix_chat_session_chat_id", table_name="chat_session")
+    op.drop_index("ix_chat_session_user_uuid", table_name="chat_session")
+    op.execute("""
+        ALTER TABLE chat_session
+            DROP CONSTRAINT chat_session_pkey,
+            DROP COLUMN id,
+            ALTER COLUMN chat_id TYPE uuid USING chat_id::uuid,
+            ALTER COLUMN user_uuid TYPE uuid USING user_uuid::uuid,
+            ALTER COLUMN created_at SET NOT NULL,
+            ADD CONSTRAINT chat_session_pkey PRIMARY KEY (chat_id)
+    """)
+    op.create_index("ix_chat_session_user_uuid_created_at", "chat_session", ["user_uuid", "created_at"])
+
+    op.drop_index("ix_chat_message_id", table_name="chat_message")
+    op.drop_index("ix_chat_message_chat_id", table_name="chat_message")
+    op.drop_index("ix_chat_message_user_uuid", table_name="chat_message")
+
+    if not partitioned:
+        op.execute("""
+            ALTER TABLE chat_message
+                DROP COLUMN user_uuid,
+                ALTER COLUMN id TYPE bigint,
+                ALTER COLUMN chat_id TYPE uuid USING chat_id::uuid,
+                ALTER COLUMN created_at SET NOT NULL,
+                ADD CONSTRAINT chat_message_chat_id_fkey FOREIGN KEY (chat_id)
+                    REFERENCES chat_session (chat_id) ON DELETE CASCADE
+        """)
+        op.execute("ALTER SEQUENCE chat_message_id_seq AS bigint")
+        op.create_index("ix_chat_message_chat_id_created_at", "chat_message", ["chat_id", "created_at"])
+        return
+
+    op.execute("ALTER TABLE chat_message RENAME TO chat_message_legacy")
+    op.execute("ALTER TABLE chat_message_legacy RENAME CONSTRAINT chat_message_pkey TO chat_message_legacy_pkey")
+    op.execute("ALTER TABLE chat_message_legacy ALTER COLUMN id DROP DEFAULT")
+    op.execute("ALTER SEQUENCE chat_message_id_seq AS bigint OWNED BY NONE")
+    op.execute("""
+        CREATE TABLE chat_message (
+            id bigint NOT NULL DEFAULT nextval('chat_message_id_seq'),
+            chat_id uuid NOT NULL REFERENCES chat_session (chat_id) ON DELETE CASCADE,
+            role varchar(10) NOT NULL,
+            content text NOT NULL,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            CONSTRAINT chat_message_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.create_index("ix_chat_message_chat_id_created_at", "chat_message", ["chat_id", "created_at"])
+    op.execute("CREATE TABLE chat_message_default PARTITION OF chat_message DEFAULT")
+    op.execute(PARTITION_FUNCTION)
+    op.execute("""
+        SELECT ensure_chat_message_partitions(
+            3, COALESCE((SELECT min(created_at) FROM chat_message_legacy)::date, now()::date))
+    """)
+    op.execute("""
+        INSERT INTO chat_message (id, chat_id, role, content, created_at)
+        SELECT id, chat_id::uuid, role, content, created_at FROM chat_message_legacy
+    """)
+    op.execute("DROP TABLE chat_message_legacy")
+    op.execute("ALTER SEQUENCE chat_message_id_seq OWNED BY chat_message.id")
+
+
+def downgrade_postgresql():
+    op.execute("ALTER TABLE chat_message RENAME TO chat_message_compact")
+    op.execute("ALTER TABLE chat_message_compact RENAME CONSTRAINT chat_message_pkey TO chat_message_compact_pkey")
+    op.execute("ALTER TABLE chat_message_compact ALTER COLUMN id DROP DEFAULT")
+    op.execute("ALTER SEQUENCE chat_message_id_seq OWNED BY NONE")
+    op.execute("""
+        CREATE TABLE chat_message (
+            id integer NOT NULL DEFAULT nextval('chat_message_id_seq') PRIMARY KEY,
+            chat_id varchar(36) NOT NULL,
+            user_uuid varchar(36) NOT NULL,
+            role varchar(10) NOT NULL,
+            content text NOT NULL,
+            created_at timestamptz DEFAULT now()
+        )
+    """)
+    op.execute("""
+        INSERT INTO chat_message (id, chat_id, user_uuid, role, content, created_at)
+        SELECT m.id, m.chat_id::text, s.user_uuid::text, m.role, m.content, m.created_at
+        FROM chat_message_compact m JOIN chat_session s ON s.chat_id = m.chat_id
+    """)
+    op.execute("DROP TABLE chat_message_compact CASCADE")
+    op.execute("DROP FUNCTION IF EXISTS ensure_chat_message_partitions(integer, date)")
+    op.execute("ALTER SEQUENCE chat_message_id_seq AS integer OWNED BY chat_message.id")
+    op.create_index("ix_chat_message_id", "chat_message", ["id"])
+    op.create_index("ix_chat_message_chat_id", "chat_message", ["chat_id"])
+    op.create_index("ix_chat_message_user_uuid", "chat_message", ["user_uuid"])
+
+    op.drop_index("ix_chat_session_user_uuid_created_at", table_name="chat_session")
+    op.execute("""
+        ALTER TABLE chat_session
+            DROP CONSTRAINT chat_session_pkey,
+            ALTER COLUMN chat_id TYPE varchar(36) USING chat_id::text,
+            ALTER COLUMN user_uuid TYPE varchar(36) USING user_uuid::text,
+            ALTER COLUMN created_at DROP NOT NULL,
+            ADD COLUMN id serial PRIMARY KEY
+    """)
+    op.create_index("ix_chat_session_id", "chat_session", ["id"])
+    op.create_index("ix_chat_session_chat_id", "chat_session", ["chat_id"], unique=True)
+    op.create_index("ix_chat_session_user_uuid", "chat_session", ["user_uuid"])
+
+
+def create_chat_tables(compact: bool):
+    if compact:
+        session_table = op.create_table(
+            "chat_session",
+            sa.Column("chat_id", sa.Uuid(as_uuid=False), primary_key=True),
+            sa.Column("user_uuid", sa.Uuid(as_uuid=False), nullable=False),
+            sa.Column("title", sa.String(255)),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        )
+        op.create_index("ix_chat_session_user_uuid_created_at", "chat_session", ["user_uuid", "created_at"])
+        message_table = op.create_table(
+            "chat_message",
+            sa.Column("id", sa.BigInteger().with_variant(sa.Integer, "sqlite"), primary_key=True),
+            sa.Column(
+                "chat_id",
+                sa.Uuid(as_uuid=False),
+                sa.ForeignKey("chat_session.chat_id", ondelete="CASCADE"),
+                nullable=False),
+            sa.Column("role", sa.String(10), nullable=False),
+            sa.Column("content", sa.Text, nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        )
+        op.create_index("ix_chat_message_chat_id_created_at", "chat_message", ["chat_id", "created_at"])
+        return session_table, message_table
+
+    session_table = op.create_table(
+        "chat_session",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("chat_id", sa.String(36), nullable=False),
+        sa.Column("user_uuid", sa.String(36), nullable=False),
+        sa.Column("title", sa.String(255)),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_chat_session_id", "chat_session", ["id"])
+    op.create_index("ix_chat_session_chat_id", "chat_session", ["chat_id"], unique=True)
+    op.create_index("ix_chat_session_user_uuid", "chat_session", ["user_uuid"])
+    message_table = op.create_table(
+        "chat_message",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("chat_id", sa.String(36), nullable=False),
+        sa.Column("user_uuid", sa.String(36), nullable=False),
+        sa.Column("role", sa.String(10), nullable=False),
+        sa.Column("content", sa.Text, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_chat_message_id", "chat_message", ["id"])
+    op.create_index("ix_chat_message_chat_id", "chat_message", ["chat_id"])
+    op.create_index("ix_chat_message_user_uuid", "chat_message", ["user_uuid"])
+    return session_table, message_table
+
+
+def rebuild_generic(compact: bool):
+    bind = op.get_bind()
+    id_type = sa.String(36) if compact else sa.Uuid(as_uuid=False)
+    session_rows = bind.execute(
+        sa.text("SELECT chat_id, user_uuid, title, created_at FROM chat_session")
+        .columns(chat_id=id_type, user_uuid=id_type, created_at=sa.DateTime(timezone=True))
+    ).mappings().all()
+    message_rows = bind.execute(
+        sa.text("SELECT id, chat_id, role, content, created_at FROM chat_message")
+        .columns(chat_id=id_type, created_at=sa.DateTime(timezone=True))
+    ).mappings().all()
+
+    op.drop_table("chat_message")
+    op.drop_table("chat_session")
+    session_table, message_table = create_chat_tables(compact)
+
+    now = datetime.now(timezone.utc)
+    owners = {str(row["chat_id"]): str(row["user_uuid"]) for row in session_rows}
+    op.bulk_insert(session_table, [
+        {
+            "chat_id": str(row["chat_id"]),
+            "user_uuid": str(row["user_uuid"]),
+            "title": row["title"],
+            "created_at": row["created_at"] or now,
+        }
+        for row in session_rows
+    ])
+    messages = []
+    for row in message_rows:
+        chat_id = str(row["chat_id"])
+        if chat_id not in owners:
+            continue
+        message = {
+            "id": row["id"],
+            "chat_id": chat_id,
+            "role": row["role"],
+            "content": row["content"],
+            "created_at": row["created_at"] or now,
+        }
+        if not compact:
+            message["user_uuid"] = owners[chat_id]
+        messages.append(message)
+    op.bulk_insert(message_table, messages)
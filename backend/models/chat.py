@@ -1,28 +1,37 @@
 import uuid
-from sqlalchemy import Column, Integer, String, DateTime, Text, func
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Text, ForeignKey, Index, Uuid, func
 from core.db import Base
 
 
 class ChatSession(Base):
     __tablename__ = "chat_session"
-    id = Column(Integer, primary_key=True, index=True)
     chat_id = Column(
-        String(36),
-        unique=True,
-        index=True,
-        nullable=False,
+        Uuid(as_uuid=False),
+        primary_key=True,
         default=lambda: str(uuid.uuid4()),
     )
-    user_uuid = Column(String(36), index=True, nullable=False)
+    user_uuid = Column(Uuid(as_uuid=False), nullable=False)
     title = Column(String(255), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_chat_session_user_uuid_created_at", "user_uuid", "created_at"),
+    )
 
 
 class ChatMessage(Base):
     __tablename__ = "chat_message"
-    id = Column(Integer, primary_key=True, index=True)
-    chat_id = Column(String(36), index=True, nullable=False)
-    user_uuid = Column(String(36), index=True, nullable=False)
+    # Partitioned deployments use (id, created_at) as the primary key, see migrations/versions.
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    chat_id = Column(
+        Uuid(as_uuid=False),
+        ForeignKey("chat_session.chat_id", ondelete="CASCADE"),
+        nullable=False,
+    )
     role = Column(String(10), nullable=False)  # user / assistant
     content = Column(Text, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_chat_message_chat_id_created_at", "chat_id", "created_at"),
+    )
@@ -1,3 +1,5 @@
 from .auth import router as auth_router
 from .chat import router as chat_router
-__all__ = ["auth_router", "chat_engine_router"]
\ No newline at end of file
+from .metrics import router as metrics_router
+from .admin import router as admin_router
+__all__ = ["auth_router", "chat_engine_router", "metrics_router", "admin_router"]
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi.responses import FileResponse
+
+from core.security import verify_admin_token
+from core.profiling import request_profiler
+
+def require_admin(x_admin_token: str = Header(None)):
+    if not verify_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+@router.get("/profiles")
+def list_profiles():
+    return {"profiles": request_profiler.list()}
+
+@router.get("/profiles/{request_id}")
+def download_profile(request_id: str):
+    path = request_profiler.folded_path(request_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=f"{request_id}.folded")
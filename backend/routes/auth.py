@@ -3,6 +3,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
 
 from core.db import SessionLocal
+from core.cache import chat_cache
 from core.security import (
     hash_password,
     verify_password,
@@ -115,4 +116,5 @@ def delete_user(user_uuid: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="User not found")
     db.delete(user)
     db.commit()
+    chat_cache.invalidate_user(user_uuid)
     return {"message": "User deleted successfully"}
\ No newline at end of file
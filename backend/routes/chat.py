@@ -1,17 +1,25 @@
 import os
+import time
+import uuid
 import tempfile
 from pathlib import Path
+from typing import Optional
 from pydub import AudioSegment
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
 
 from utils.agentic_system_module import agentic_system
 from utils.title_generator_module import generate_title
 from utils.asr_module import transcribe_audio_google
+from utils.faq_module import faq_index
 from schemas.chat import ChatStart, ChatResponse, ChatAsk, ChatTitleRequest
 from models import User, ChatSession, ChatMessage
 from core.db import SessionLocal 
+from core.config import config
+from core.admission import admission_controller, AdmissionRejected
+from core.cache import chat_cache, public_message
+from core.profiling import profiled
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
@@ -30,6 +38,37 @@ def convert_to_wav(source_path: str) -> str:
     audio.export(wav_path, format="wav")
     return wav_path
 
+def is_valid_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+def session_entry(session: ChatSession) -> dict:
+    return {
+        "chat_id": session.chat_id,
+        "title": session.title,
+        "created_at": session.created_at.isoformat(),
+    }
+
+def message_entry(message: ChatMessage) -> dict:
+    return {
+        "id": message.id,
+        "role": message.role,
+        "content": message.content,
+        "created_at": message.created_at.isoformat(),
+    }
+
+def save_message(db: Session, chat_id: str, role: str, content: str) -> dict:
+    message = ChatMessage(chat_id=chat_id, role=role, content=content)
+    db.add(message)
+    # id and created_at come back from the INSERT, before commit expires them.
+    db.flush()
+    entry = message_entry(message)
+    db.commit()
+    return entry
+
 def get_db():
     db = SessionLocal()
     try:
@@ -65,60 +104,98 @@ async def asr(file: UploadFile = File(...), language: str = "fa-IR"):
                 os.remove(path)
 
 @router.post("/ask", response_model=ChatResponse)
+@profiled
 def ask(payload: ChatAsk, db: Session = Depends(get_db)):
+    deadline = time.monotonic() + config["AGENT_DEADLINE_SECONDS"]
+    try:
+        # Shed users over their limits before paying for the FAQ encoder pass.
+        admission_controller.check_user(payload.user_uuid)
+        faq_hit = faq_index.match(payload.message) if faq_index else None
+        if faq_hit:
+            # FAQ answers skip the global queue but still count against the user's limits.
+            with admission_controller.admit_user(payload.user_uuid):
+                return answer_question(payload, db, faq_hit)
+
+        with admission_controller.admit(payload.user_uuid):
+            return answer_question(payload, db, deadline=deadline)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many requests ({e.reason})",
+            headers={"Retry-After": e.retry_after_header})
+
+
+def answer_question(
+    payload: ChatAsk,
+    db: Session,
+    faq_hit: Optional[dict] = None,
+    deadline: Optional[float] = None,
+) -> dict:
     user = db.query(User).filter(User.uuid == payload.user_uuid).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     session = None
-    if payload.chat_id:
+    if payload.chat_id and is_valid_uuid(payload.chat_id):
         session = db.query(ChatSession).filter(
             ChatSession.chat_id == payload.chat_id,
             ChatSession.user_uuid == payload.user_uuid
         ).first()
 
-    if not session:
+    new_chat = session is None
+    if new_chat:
         session = ChatSession(user_uuid=payload.user_uuid)
         db.add(session)
         db.commit()
         db.refresh(session)
+        chat_cache.add_session(payload.user_uuid, session_entry(session))
+    chat_id = session.chat_id
 
-    user_msg = ChatMessage(
-        chat_id=session.chat_id,
-        user_uuid=payload.user_uuid,
-        role="user",
-        content=payload.message,
-    )
-    db.add(user_msg)
-    db.commit()
+    user_msg = save_message(db, chat_id, "user", payload.message)
+    chat_cache.add_messages(payload.user_uuid, chat_id, [user_msg], new_chat=new_chat)
 
     if session.title is None:
         try:
-            title = generate_title([{"role": "user", "content": payload.message}])
+            if faq_hit:
+                title = faq_hit["question"][:255]
+            else:
+                title = generate_title([{"role": "user", "content": payload.message}], deadline)
             session.title = title
             db.commit()
+            chat_cache.set_title(payload.user_uuid, chat_id, title)
         except Exception:
             db.rollback()
 
-    answer = agentic_system(payload.message)
+    if faq_hit:
+        answer = faq_hit["answer"]
+    else:
+        result = agentic_system(payload.message, deadline)
+        answer = result["answer"]
 
-    bot_msg = ChatMessage(
-        chat_id=session.chat_id,
-        user_uuid=payload.user_uuid,
-        role="assistant",
-        content=answer,
-    )
-    db.add(bot_msg)
-    db.commit()
+    bot_msg = save_message(db, chat_id, "assistant", answer)
+    chat_cache.add_messages(payload.user_uuid, chat_id, [bot_msg])
 
-    return {"chat_id": session.chat_id, "answer": answer}
+    if faq_hit:
+        return {"chat_id": chat_id, "answer": answer, "source": "faq", "faq_score": faq_hit["score"]}
+    return {
+        "chat_id": chat_id,
+        "answer": answer,
+        "source": "agent",
+        "rounds": result["rounds"],
+        "degraded": result["degraded"],
+        "elapsed_ms": result["elapsed_ms"],
+        "budget_ms": result["budget_ms"],
+    }
 
 
 @router.post("/title")
+@profiled
 def generate_chat_title(payload: ChatTitleRequest, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.uuid == payload.user_uuid).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    if not is_valid_uuid(payload.chat_id):
+        raise HTTPException(status_code=404, detail="Chat not found")
 
     session = db.query(ChatSession).filter(
         ChatSession.chat_id == payload.chat_id,
@@ -133,11 +210,17 @@ def generate_chat_title(payload: ChatTitleRequest, db: Session = Depends(get_db)
     title = generate_title([{"role": "user", "content": payload.message}])
     session.title = title
     db.commit()
+    chat_cache.set_title(payload.user_uuid, session.chat_id, title)
     return {"chat_id": session.chat_id, "title": title}
 
 
 @router.get("/sessions/{user_uuid}")
+@profiled
 def list_sessions(user_uuid: str, db: Session = Depends(get_db)):
+    cached = chat_cache.sessions(user_uuid)
+    if cached is not None:
+        return {"chat_ids": [session["chat_id"] for session in cached]}
+
     user = db.query(User).filter(User.uuid == user_uuid).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -151,7 +234,13 @@ def list_sessions(user_uuid: str, db: Session = Depends(get_db)):
 
 
 @router.get("/sessions/{user_uuid}/details")
+@profiled
 def list_session_details(user_uuid: str, db: Session = Depends(get_db)):
+    cached = chat_cache.sessions(user_uuid)
+    if cached is not None:
+        return {"sessions": cached}
+
+    version = chat_cache.version(user_uuid)
     user = db.query(User).filter(User.uuid == user_uuid).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -162,23 +251,29 @@ def list_session_details(user_uuid: str, db: Session = Depends(get_db)):
         .order_by(ChatSession.created_at.desc())
         .all()
     )
-    return {
-        "sessions": [
-            {
-                "chat_id": session.chat_id,
-                "title": session.title,
-                "created_at": session.created_at,
-            }
-            for session in sessions
-        ]
-    }
+    entries = [session_entry(session) for session in sessions]
+    chat_cache.fill_sessions(user_uuid, entries, version)
+    return {"sessions": entries}
 
 
 @router.get("/messages/{user_uuid}/{chat_id}")
-def get_messages(user_uuid: str, chat_id: str, db: Session = Depends(get_db)):
+@profiled
+def get_messages(
+    user_uuid: str,
+    chat_id: str,
+    limit: Optional[int] = Query(None, ge=1, description="Only return the newest `limit` messages"),
+    db: Session = Depends(get_db),
+):
+    cached = chat_cache.messages(user_uuid, chat_id, limit)
+    if cached is not None:
+        return {"chat_id": chat_id, "messages": cached}
+
+    version = chat_cache.version(user_uuid)
     user = db.query(User).filter(User.uuid == user_uuid).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    if not is_valid_uuid(chat_id):
+        raise HTTPException(status_code=404, detail="Chat not found")
 
     session = db.query(ChatSession).filter(
         ChatSession.chat_id == chat_id,
@@ -187,20 +282,16 @@ def get_messages(user_uuid: str, chat_id: str, db: Session = Depends(get_db)):
     if not session:
         raise HTTPException(status_code=404, detail="Chat not found")
 
-    messages = (
-        db.query(ChatMessage)
-        .filter(ChatMessage.chat_id == chat_id, ChatMessage.user_uuid == user_uuid)
-        .order_by(ChatMessage.created_at.asc())
-        .all()
-    )
+    query = db.query(ChatMessage).filter(ChatMessage.chat_id == session.chat_id)
+    if limit is None:
+        messages = query.order_by(ChatMessage.created_at.asc(), ChatMessage.id.asc()).all()
+    else:
+        messages = query.order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc()).limit(limit).all()[::-1]
+
+    entries = [message_entry(message) for message in messages]
+    complete = limit is None or len(entries) < limit
+    chat_cache.fill_messages(user_uuid, chat_id, entries, complete, version)
     return {
         "chat_id": chat_id,
-        "messages": [
-            {
-                "role": message.role,
-                "content": message.content,
-                "created_at": message.created_at,
-            }
-            for message in messages
-        ],
+        "messages": [public_message(entry) for entry in entries],
     }
\ No newline at end of file
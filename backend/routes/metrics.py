@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+
+from core.admission import admission_controller
+from core.cache import chat_cache
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+@router.get("/admission")
+def admission_metrics():
+    return admission_controller.stats()
+
+@router.get("/cache")
+def cache_metrics():
+    return chat_cache.stats()
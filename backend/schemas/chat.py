@@ -17,4 +17,10 @@ class ChatTitleRequest(BaseModel):
 
 class ChatResponse(BaseModel):
     chat_id : str
-    answer : str
\ No newline at end of file
+    answer : str
+    source : str = "agent"  # agent / faq
+    faq_score : Optional[float] = None
+    rounds : int = 0
+    degraded : bool = False
+    elapsed_ms : Optional[float] = None
+    budget_ms : Optional[float] = None
\ No newline at end of file
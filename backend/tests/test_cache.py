@@ -0,0 +1,91 @@
+from core.cache import ChatCache, MemoryCacheBackend, SESSIONS_FIELD, messages_field
+
+USER = "user-a"
+CHAT = "00000000-0000-0000-0000-000000000001"
+
+
+def message(id: int, role: str = "user") -> dict:
+    return {"id": id, "role": role, "content": f"message {id}", "created_at": f"2024-01-01T00:00:{id:02d}"}
+
+
+def session(chat_id: str, title: str = "") -> dict:
+    return {"chat_id": chat_id, "title": title}
+
+
+def make_cache(max_items: int = 1000) -> ChatCache:
+    return ChatCache(MemoryCacheBackend(max_items, max_fields_per_user=10), message_tail=50)
+
+
+def test_fill_then_hit():
+    cache = make_cache()
+    version = cache.version(USER)
+    cache.fill_sessions(USER, [session(CHAT)], version)
+    assert cache.sessions(USER) == [session(CHAT)]
+
+
+def test_fill_rejected_after_concurrent_update():
+    cache = make_cache()
+    cache.fill_sessions(USER, [], cache.version(USER))
+
+    version = cache.version(USER)
+    cache.add_session(USER, session(CHAT))
+    cache.fill_sessions(USER, [], version)
+
+    assert cache.sessions(USER) == [session(CHAT)]
+
+
+def test_update_does_not_create_missing_entries():
+    cache = make_cache()
+    cache.add_session(USER, session(CHAT))
+    cache.add_messages(USER, CHAT, [message(1)])
+    assert cache.backend.get(USER, SESSIONS_FIELD) is None
+    assert cache.backend.get(USER, messages_field(CHAT)) is None
+
+
+def test_new_chat_creates_entry():
+    cache = make_cache()
+    cache.add_messages(USER, CHAT, [message(1)], new_chat=True)
+    cache.add_messages(USER, CHAT, [message(2, "bot")])
+    assert [m["content"] for m in cache.messages(USER, CHAT)] == ["message 1", "message 2"]
+
+
+def test_invalidate_blocks_new_chat_from_in_flight_request():
+    cache = make_cache()
+    cache.fill_sessions(USER, [session(CHAT)], cache.version(USER))
+
+    cache.invalidate_user(USER)
+    cache.add_messages(USER, CHAT, [message(1)], new_chat=True)
+
+    assert cache.backend.get(USER, messages_field(CHAT)) is None
+    assert cache.sessions(USER) is None
+
+
+def test_invalidate_rejects_fill_started_before_and_after():
+    cache = make_cache()
+    version = cache.version(USER)
+    cache.invalidate_user(USER)
+    cache.fill_sessions(USER, [session(CHAT)], version)
+    cache.fill_sessions(USER, [session(CHAT)], cache.version(USER))
+    assert cache.sessions(USER) is None
+
+
+def test_eviction_rejects_stale_fill():
+    cache = make_cache(max_items=3)
+    cache.fill_sessions(USER, [], cache.version(USER))
+
+    version = cache.version(USER)
+    cache.add_session(USER, session(CHAT))
+    cache.fill_sessions("user-b", [session("b1"), session("b2")], cache.version("user-b"))
+    assert cache.backend.stats()["evictions"] == 1
+
+    cache.fill_sessions(USER, [], version)
+    assert cache.sessions(USER) is None
+
+
+def test_fill_after_eviction_with_fresh_version():
+    cache = make_cache(max_items=3)
+    cache.fill_sessions(USER, [session(CHAT)], cache.version(USER))
+    cache.fill_sessions("user-b", [session("b1"), session("b2")], cache.version("user-b"))
+
+    cache.fill_sessions(USER, [session(CHAT)], cache.version(USER))
+    assert cache.sessions(USER) == [session(CHAT)]
@@ -1,21 +1,27 @@
 import os
 import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 
-from utils.retrieval_module import FaissRetriever
+from core.config import config
+from core.profiling import profiled, propagate
+from utils.retrieval_module import FaissRetriever, search_retrievers
 
 from typing import Annotated, List
 from typing_extensions import TypedDict
 from langchain.chat_models import init_chat_model
 from langchain.tools import tool
-from langgraph.graph import StateGraph, START
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.graph import StateGraph, START, END
 from langgraph.graph import add_messages
-from langgraph.prebuilt import ToolNode, tools_condition
+from langgraph.prebuilt import ToolNode
 
-bachelor_faiss_path = r".\vectordb\bachelor_faiss_index"
-postgraduate_faiss_path = r".\vectordb\postgraduate_faiss_index"
-international_faiss_path = r".\vectordb\international_faiss_index"
-ostads_faiss_path = r".\vectordb\ostads_faiss_index"
-embedding_model_path = r"embedding_model"
+bachelor_faiss_path = os.path.join("vectordb", "bachelor_faiss_index")
+postgraduate_faiss_path = os.path.join("vectordb", "postgraduate_faiss_index")
+international_faiss_path = os.path.join("vectordb", "international_faiss_index")
+ostads_faiss_path = os.path.join("vectordb", "ostads_faiss_index")
+embedding_model_path = config["EMBEDDING_MODEL_PATH"]
 
 bachelor_retriever = FaissRetriever(
     faiss_path=bachelor_faiss_path,
@@ -33,13 +39,18 @@ ostads_retriever = FaissRetriever(
     faiss_path=ostads_faiss_path,
     model_path=embedding_model_path)
 
-with open(r"./config.json", "r", encoding="utf-8") as f:
-    config = json.load(f)
-
 llm_model = config["GROQ_LLM_MODEL"]
 api_key = config["GROQ_API_KEY"]
 
+agent_deadline_seconds = config["AGENT_DEADLINE_SECONDS"]
+max_tool_rounds = config["AGENT_MAX_TOOL_ROUNDS"]
+llm_call_timeout_seconds = config["AGENT_LLM_CALL_TIMEOUT_SECONDS"]
+min_final_answer_seconds = config["AGENT_MIN_FINAL_ANSWER_SECONDS"]
+
+logger = logging.getLogger("app")
+
 @tool
+@profiled
 def bachelor_tool(query: str) -> List[str]:
     """
     Retrieve official university educational, administrative, and Kehad course information.
@@ -79,6 +90,7 @@ def bachelor_tool(query: str) -> List[str]:
     return results
 
 @tool
+@profiled
 def international_tool(query: str) -> List[str]:
     """
     Retrieve authoritative information on international graduate (Master’s and PhD)
@@ -119,6 +131,7 @@ def international_tool(query: str) -> List[str]:
     return results
 
 @tool
+@profiled
 def postgraduate_tool(query: str) -> List[str]:
     """
     Retrieve relevant information from official postgraduate (Master’s and PhD)
@@ -152,6 +165,7 @@ def postgraduate_tool(query: str) -> List[str]:
     return results
 
 @tool
+@profiled
 def ostads_tool(query: str) -> List[str]:
     """
     Retrieve information about faculty members of the Electrical and Computer Engineering
@@ -178,27 +192,121 @@ llm = init_chat_model(
     llm_model,
     model_provider="groq",
     api_key=config["GROQ_API_KEY"],
+    base_url=config["GROQ_BASE_URL"],
+    timeout=llm_call_timeout_seconds,
+    max_retries=1,
     temperature=0.0)
 
 tools = [bachelor_tool, international_tool, postgraduate_tool, ostads_tool]
 llm_with_tools = llm.bind_tools(tools)
+tool_node = ToolNode(tools)
+
+# LLM calls run here so a stalled provider cannot hold a request past its deadline.
+llm_executor = ThreadPoolExecutor(max_workers=config["AGENT_LLM_WORKERS"], thread_name_prefix="agent-llm")
+
+FINAL_ANSWER_PROMPT = """
+زمان پاسخ‌گویی رو به پایان است. دیگر ابزاری فراخوانی نکن و فقط بر اساس اطلاعاتی که تا این لحظه بازیابی شده است، کامل‌ترین پاسخ ممکن را بده.
+"""
+
+PASSAGES_HEADER = "پاسخ کامل در زمان مقرر آماده نشد. مرتبط‌ترین بخش‌های مستندات دانشگاه برای پرسش شما:"
 
 class State(TypedDict):
     messages : Annotated[list, add_messages]
-
-def tool_calling(state:State) -> State:
-    return {"messages" : llm_with_tools.invoke(state["messages"])}
+    query : str
+    deadline : float
+    rounds : int
+    degraded : bool
+
+def remaining_seconds(state: State) -> float:
+    return state["deadline"] - time.monotonic()
+
+def invoke_before_deadline(model, messages: list, deadline: float):
+    timeout = min(llm_call_timeout_seconds, deadline - time.monotonic())
+    if timeout <= 0:
+        raise TimeoutError("Agent deadline exceeded")
+    future = llm_executor.submit(propagate(model.invoke), messages)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        future.cancel()
+        raise TimeoutError(f"LLM call exceeded {timeout:.1f}s")
+
+@profiled
+def tool_calling(state: State) -> dict:
+    try:
+        return {"messages" : invoke_before_deadline(llm_with_tools, state["messages"], state["deadline"])}
+    except Exception as e:
+        logger.warning("agent LLM call failed after %d tool rounds: %s", state["rounds"], e)
+        return {"degraded" : True}
+
+@profiled
+def run_tools(state: State) -> dict:
+    result = tool_node.invoke({"messages" : state["messages"]})
+    return {"messages" : result["messages"], "rounds" : state["rounds"] + 1}
+
+def route_after_llm(state: State) -> str:
+    if state["degraded"]:
+        return "degrade"
+    if not getattr(state["messages"][-1], "tool_calls", None):
+        return END
+    if state["rounds"] >= max_tool_rounds or remaining_seconds(state) < min_final_answer_seconds:
+        return "degrade"
+    return "tools"
+
+def retrieved_passages(messages: list) -> list[str]:
+    passages = []
+    for message in messages:
+        if not isinstance(message, ToolMessage):
+            continue
+        try:
+            content = json.loads(message.content)
+        except (TypeError, ValueError):
+            content = message.content
+        for passage in content if isinstance(content, list) else [content]:
+            if isinstance(passage, str) and passage not in passages:
+                passages.append(passage)
+    return passages
+
+@profiled
+def degrade(state: State) -> dict:
+    """Answer from whatever context was gathered before the budget ran out."""
+    messages = state["messages"]
+    if getattr(messages[-1], "tool_calls", None):
+        messages = messages[:-1]
+    passages = retrieved_passages(messages)
+
+    if passages and not state["degraded"] and remaining_seconds(state) >= min_final_answer_seconds:
+        try:
+            answer = invoke_before_deadline(llm, messages + [HumanMessage(FINAL_ANSWER_PROMPT)], state["deadline"])
+            return {"messages" : answer, "degraded" : True}
+        except Exception as e:
+            logger.warning("agent final answer failed: %s", e)
+
+    if not passages:
+        # Nothing was retrieved yet and we don't know the corpus, so search them all.
+        passages = search_retrievers(
+            [bachelor_retriever, postgraduate_retriever, international_retriever, ostads_retriever],
+            state["query"],
+            top_k=3)
+    bullets = "\n".join(f"- {passage}" for passage in passages[:5])
+    return {"messages" : AIMessage(content=f"{PASSAGES_HEADER}\n{bullets}"), "degraded" : True}
 
 builder = StateGraph(State)
 builder.add_node("tool_calling_llm", tool_calling)
-builder.add_node("tools", ToolNode(tools))
+builder.add_node("tools", run_tools)
+builder.add_node("degrade", degrade)
 builder.add_edge(START, "tool_calling_llm")
-builder.add_conditional_edges("tool_calling_llm", tools_condition)
+builder.add_conditional_edges("tool_calling_llm", route_after_llm, ["tools", "degrade", END])
 builder.add_edge("tools", "tool_calling_llm")
+builder.add_edge("degrade", END)
 
 graph = builder.compile()
 
-def agentic_system(query: str) -> str:
+def agentic_system(query: str, deadline: float = None) -> dict:
+    started_at = time.monotonic()
+    if deadline is None:
+        deadline = started_at + agent_deadline_seconds
+
     prompt = f"""    
 تو یک دستیار هوشمند آموزشی هستی که برای اداره آموزش دانشگاه علم و صنعت ایران طراحی شده‌ای و  فقط میتوانی به سوالات در مورد این دانشگاه پاسخ بدهی.
 وظیفه تو پاسخ‌گویی دقیق، شفاف و مستند به پرسش‌های دانشجویان و مراجعان درباره امور آموزشی، آیین‌نامه‌ها، مقررات، فرایندهای اداری، سامانه‌های آموزشی، و دوره‌ها و برنامه‌های آموزشی (از جمله دوره‌های کهاد) است.
@@ -214,6 +322,26 @@ def agentic_system(query: str) -> str:
 
 ورودی کاربر:{query}
 """
-    state = {"messages" : {"messages" : prompt}}
-    result = graph.invoke(state["messages"])
-    return result["messages"][-1].content
\ No newline at end of file
+    state = {
+        "messages" : prompt,
+        "query" : query,
+        "deadline" : deadline,
+        "rounds" : 0,
+        "degraded" : False,
+    }
+    result = graph.invoke(state, config={"recursion_limit" : 2 * max_tool_rounds + 4})
+    elapsed_ms = (time.monotonic() - started_at) * 1000
+    budget_ms = (deadline - started_at) * 1000
+    logger.info(
+        "agent answered in %.0fms of %.0fms budget, %d tool rounds%s",
+        elapsed_ms,
+        budget_ms,
+        result["rounds"],
+        " (degraded)" if result["degraded"] else "")
+    return {
+        "answer" : result["messages"][-1].content,
+        "rounds" : result["rounds"],
+        "degraded" : result["degraded"],
+        "elapsed_ms" : elapsed_ms,
+        "budget_ms" : budget_ms,
+    }
\ No newline at end of file
@@ -0,0 +1,159 @@
+import os
+import json
+import argparse
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from core.config import config
+
+ENCODER_BACKENDS = ("torch", "torch_int8", "onnx")
+
+_encoders = {}
+_default_torch_threads = None
+
+
+def set_torch_threads(num_threads: int):
+    """Set torch's process-wide intra-op thread count; 0 restores the library default."""
+    global _default_torch_threads
+    import torch
+
+    if _default_torch_threads is None:
+        _default_torch_threads = torch.get_num_threads()
+    torch.set_num_threads(num_threads if num_threads > 0 else _default_torch_threads)
+
+
+class TorchEncoder:
+    def __init__(self, model_path: str, num_threads: int = 0):
+        set_torch_threads(num_threads)
+        self.model = SentenceTransformer(model_path, device="cpu")
+
+    def encode(self, sentences, normalize_embeddings: bool = False, batch_size: int = 32):
+        return self.model.encode(sentences, normalize_embeddings=normalize_embeddings, batch_size=batch_size)
+
+
+class QuantizedTorchEncoder(TorchEncoder):
+    def __init__(self, model_path: str, num_threads: int = 0):
+        import torch
+
+        super().__init__(model_path, num_threads)
+        self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class OnnxEncoder:
+    """Runs an exported transformer with onnxruntime and applies the sentence-transformers pooling."""
+
+    def __init__(self, model_path: str, onnx_path: str, num_threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+
+        with open(os.path.join(model_path, "modules.json"), "r", encoding="utf-8") as f:
+            modules = json.load(f)
+        pooling_path = next(m["path"] for m in modules if m["type"].endswith("Pooling"))
+        with open(os.path.join(model_path, pooling_path, "config.json"), "r", encoding="utf-8") as f:
+            pooling = json.load(f)
+        self.pooling_mode = "cls" if pooling.get("pooling_mode_cls_token") else "mean"
+        self.normalize = any(m["type"].endswith("Normalize") for m in modules)
+
+        self.max_seq_length = self.tokenizer.model_max_length
+        bert_config_path = os.path.join(model_path, "sentence_bert_config.json")
+        if os.path.exists(bert_config_path):
+            with open(bert_config_path, "r", encoding="utf-8") as f:
+                self.max_seq_length = json.load(f).get("max_seq_length", self.max_seq_length)
+
+        options = ort.SessionOptions()
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _encode_batch(self, sentences: list[str]) -> np.ndarray:
+        tokens = self.tokenizer(
+            sentences,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np")
+        feed = {name: tokens[name].astype(np.int64) for name in self.input_names if name in tokens}
+        hidden = self.session.run(None, feed)[0]
+        if self.pooling_mode == "cls":
+            return hidden[:, 0]
+        mask = tokens["attention_mask"][..., None].astype(hidden.dtype)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(self, sentences, normalize_embeddings: bool = False, batch_size: int = 32):
+        single = isinstance(sentences, str)
+        batch = [sentences] if single else list(sentences)
+        embeddings = np.concatenate(
+            [self._encode_batch(batch[i:i + batch_size]) for i in range(0, len(batch), batch_size)])
+        if self.normalize or normalize_embeddings:
+            embeddings = embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings[0] if single else embeddings
+
+
+def create_encoder(backend: str, model_path: str, onnx_path: str = None, num_threads: int = 0):
+    if backend == "torch":
+        return TorchEncoder(model_path, num_threads)
+    if backend == "torch_int8":
+        return QuantizedTorchEncoder(model_path, num_threads)
+    if backend == "onnx":
+        return OnnxEncoder(model_path, onnx_path, num_threads)
+    raise ValueError(f"Unknown encoder backend: {backend}")
+
+
+def load_encoder(model_path: str):
+    """Shared, config-selected encoder for model_path, so every retriever reuses one copy."""
+    if model_path not in _encoders:
+        _encoders[model_path] = create_encoder(
+            config["ENCODER_BACKEND"],
+            model_path,
+            onnx_path=config["ENCODER_ONNX_PATH"],
+            num_threads=config["ENCODER_NUM_THREADS"])
+    return _encoders[model_path]
+
+
+def export_onnx(model_path: str, output_dir: str, quantize: bool = True) -> str:
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModel.from_pretrained(model_path).eval()
+    model.config.return_dict = False
+
+    sample = tokenizer(["نمونه متن برای خروجی گرفتن از مدل"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    onnx_path = os.path.join(output_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            onnx_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=17)
+    if not quantize:
+        return onnx_path
+
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    quantized_path = os.path.join(output_dir, "model_int8.onnx")
+    quantize_dynamic(onnx_path, quantized_path, weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX")
+    parser.add_argument("--model-path", default=config["EMBEDDING_MODEL_PATH"])
+    parser.add_argument("--output-dir", default=os.path.dirname(config["ENCODER_ONNX_PATH"]))
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+    print(export_onnx(args.model_path, args.output_dir, quantize=not args.no_quantize))
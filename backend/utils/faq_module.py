@@ -0,0 +1,73 @@
+import numpy as np
+
+from core.config import config
+from utils.encoder_module import load_encoder
+
+
+def parse_faq_file(path: str, separator: str = "") -> list[dict]:
+    """Split an FAQ file into question/answer pairs.
+
+    Entries are separated by lines equal to `separator` (a blank line by default);
+    the first line of each entry is the question and the remaining lines the answer.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+
+    entries, block = [], []
+    for line in lines + [separator]:
+        if line == separator.strip():
+            if len(block) > 1:
+                question = block[0].lstrip("-").strip().rstrip(":").strip()
+                entries.append({"question": question, "answer": "\n".join(block[1:])})
+            block = []
+        elif line:
+            block.append(line)
+    return entries
+
+
+class FaqIndex:
+    def __init__(self, sources: list[dict], model_path: str, threshold: float, min_margin: float):
+        self.threshold = threshold
+        self.min_margin = min_margin
+        self.model = load_encoder(model_path)
+
+        self.entries = []
+        seen = set()
+        for source in sources:
+            for entry in parse_faq_file(source["path"], source.get("separator", "")):
+                if entry["question"] in seen:
+                    continue
+                seen.add(entry["question"])
+                entry["corpus"] = source["corpus"]
+                self.entries.append(entry)
+
+        self.embeddings = np.asarray(
+            self.model.encode([entry["question"] for entry in self.entries], normalize_embeddings=True),
+            dtype=np.float32)
+
+    def match(self, query: str):
+        if not self.entries:
+            return None
+        query_embedding = np.asarray(self.model.encode(query, normalize_embeddings=True), dtype=np.float32)
+        scores = self.embeddings @ query_embedding
+        best = int(np.argmax(scores))
+        best_score = float(scores[best])
+        if best_score < self.threshold:
+            return None
+
+        best_answer = self.entries[best]["answer"]
+        runner_up = max(
+            (float(score) for i, score in enumerate(scores) if self.entries[i]["answer"] != best_answer),
+            default=-1.0)
+        if best_score - runner_up < self.min_margin:
+            return None
+        return dict(self.entries[best], score=best_score)
+
+
+faq_index = None
+if config["FAQ_ENABLED"]:
+    faq_index = FaqIndex(
+        sources=config["FAQ_SOURCES"],
+        model_path=config["EMBEDDING_MODEL_PATH"],
+        threshold=config["FAQ_MATCH_THRESHOLD"],
+        min_margin=config["FAQ_MIN_MARGIN"])
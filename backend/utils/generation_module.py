@@ -1,17 +1,15 @@
 from openai import OpenAI
-import json
-import os
 
-with open(r"./config.json", "r", encoding="utf-8") as f:
-    config = json.load(f)
+from core.config import config
 
 llm_model = config["GROQ_LLM_MODEL"]
 api_key = config["GROQ_API_KEY"]
+base_url = config["GROQ_BASE_URL"]
 
 def ask_groq_oss(prompt: str) -> str:
     client = OpenAI(
         api_key=api_key,
-        base_url="https://api.groq.com/openai/v1")
+        base_url=f"{base_url}/openai/v1")
 
     response = client.chat.completions.create(
         model=llm_model,
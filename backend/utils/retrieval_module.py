@@ -1,5 +1,7 @@
-from sentence_transformers import SentenceTransformer
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+
+from utils.encoder_module import load_encoder
 
 
 class DummyEmbeddings:
@@ -13,7 +15,7 @@ class DummyEmbeddings:
 class FaissRetriever:
     def __init__(self, faiss_path: str, model_path: str):
         self.faiss_path = faiss_path
-        self.model = SentenceTransformer(model_path)
+        self.model = load_encoder(model_path)
         self.vectorstore = FAISS.load_local(
             faiss_path,
             embeddings=DummyEmbeddings(),
@@ -30,4 +32,21 @@ class FaissRetriever:
             query_embedding,
             k=top_k)
 
-        return [doc.page_content for doc in docs]
\ No newline at end of file
+        return [doc.page_content for doc in docs]
+
+    def search_with_scores(self, query_embedding: list[float], top_k: int = 5) -> list[tuple[str, float]]:
+        """Passages with a similarity score where higher is better."""
+        docs = self.vectorstore.similarity_search_with_score_by_vector(query_embedding, k=top_k)
+        if self.vectorstore.distance_strategy == DistanceStrategy.MAX_INNER_PRODUCT:
+            return [(doc.page_content, float(score)) for doc, score in docs]
+        return [(doc.page_content, -float(score)) for doc, score in docs]
+
+
+def search_retrievers(retrievers: list[FaissRetriever], query: str, top_k: int = 5) -> list[str]:
+    """Best passages across indexes built with the same encoder, merged by score."""
+    query_embedding = retrievers[0]._embed_query(query)
+    best = {}
+    for retriever in retrievers:
+        for passage, score in retriever.search_with_scores(query_embedding, top_k):
+            best[passage] = max(score, best.get(passage, score))
+    return sorted(best, key=best.get, reverse=True)[:top_k]
\ No newline at end of file
@@ -1,16 +1,138 @@
-import os
-import json
+import re
+import time
+
+import numpy as np
 from langchain_groq import ChatGroq
 
-with open(r"./config.json", "r", encoding="utf-8") as f:
-    config = json.load(f)
+from core.config import config
 
 llm_model = config["GROQ_LLM_MODEL"]
 api_key = config["GROQ_API_KEY"]
 
-llm = ChatGroq(model=llm_model, api_key=api_key)
+title_generator = config["TITLE_GENERATOR"]
+title_max_words = config["TITLE_MAX_WORDS"]
+title_embedding_scoring = config["TITLE_EMBEDDING_SCORING"]
+title_llm_timeout_seconds = config["TITLE_LLM_TIMEOUT_SECONDS"]
+# Length of chat_sessions.title.
+TITLE_MAX_CHARS = 255
+
+llm = ChatGroq(
+    model=llm_model,
+    api_key=api_key,
+    base_url=config["GROQ_BASE_URL"],
+    timeout=title_llm_timeout_seconds,
+    max_retries=0)
+
+CHARACTER_MAP = str.maketrans({
+    "ي": "ی",
+    "ى": "ی",
+    "ئ": "ی",
+    "ك": "ک",
+    "ة": "ه",
+    "ۀ": "ه",
+    "أ": "ا",
+    "إ": "ا",
+    "ٱ": "ا",
+    "ؤ": "و",
+    "ـ": "",
+})
+DIACRITICS = re.compile(r"[\u064B-\u065F\u0670]")
+ZWNJ = "\u200c"
+TOKEN = re.compile(r"[\w\u200c\u064B-\u065F\u0670]+")
+
+STOP_WORDS = frozenset(DIACRITICS.sub("", word.translate(CHARACTER_MAP)).replace(ZWNJ, "") for word in """
+و یا اما ولی اگر که تا را رو به با از در بر برای بی پس پیش بین روی زیر بالای درباره مورد
+این آن اون همین همان هر همه چند چندین یک دو یکی هیچ دیگر دیگه خود خودم خودش ما من تو او شما ایشان آنها اونها
+مرا منو بهم ها های ای اینکه آنکه چون چرا چطور چطوری چگونه چگونگی چیست چیه چی چه چقدر کجا کجاست کی کیه کیست کس کسی کدام کدوم کدومه چکار چیکار چجوری چطوره چقدره
+آیا ایا است هست هستش نیست بود بوده باشد باشه باشم باشند شد شده شود شه میشه میشود می‌شود نمیشه نمی‌شود
+کرد کرده کردن کند کنه کنم کنیم کنید کنند میکنم می‌کنم میکنند می‌کنند
+دارم داره دارد داریم دارند داشت داشتم داشته ندارم نداره
+توان توانم میتوانم می‌توانم میتونم می‌تونم بتوانم بتونم
+خواهم خواهد میخواهم می‌خواهم میخوام می‌خوام میخواستم می‌خواستم خواستم
+بدانم بدونم بگید بگویید بفرمایید بپرسم بگم بگیرم بدم بدهم
+سلام درود وقت بخیر خسته نباشید لطفا لطفاً ممنون مرسی متشکرم سپاس تشکر ببخشید
+باید نباید الان الآن اکنون هم نیز فقط خیلی بسیار حتی دقیقا دقیقاً لطف سوال سؤال سوالم پرسش
+مگه مگر آخه یعنی اصلا اصلاً واقعا واقعاً حالا همچنین
+the a an and or but if of to in on for with about is are was were be been do does did
+how what when where which who why can could should would will i my me we our you your it its this that
+please hi hello thanks thank want need know tell
+""".split())
+
+def normalize_text(text: str) -> str:
+    text = DIACRITICS.sub("", text.translate(CHARACTER_MAP))
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def token_key(token: str) -> str:
+    return normalize_text(token).lower()
+
+
+def is_stop_word(key: str) -> bool:
+    if key.replace(ZWNJ, "") in STOP_WORDS or len(key) < 2 and not key.isdigit():
+        return True
+    # Present/continuous verb forms (mi-/nemi- + ZWNJ) rarely belong in a title.
+    return key.startswith(("می" + ZWNJ, "نمی" + ZWNJ))
+
+
+def candidate_phrases(tokens: list[str], keys: dict) -> list[tuple[int, list[str]]]:
+    phrases, current, start = [], [], 0
+    for i, token in enumerate(tokens):
+        if is_stop_word(keys[token]):
+            if current:
+                phrases.append((start, current))
+            current = []
+        else:
+            if not current:
+                start = i
+            current.append(token)
+    if current:
+        phrases.append((start, current))
+    return phrases
+
+
+def embedding_weights(phrases: list[str], text: str) -> list[float]:
+    from utils.encoder_module import load_encoder
 
-def generate_title(message: list[dict]) -> str:
+    encoder = load_encoder(config["EMBEDDING_MODEL_PATH"])
+    vectors = np.asarray(encoder.encode([text] + phrases, normalize_embeddings=True))
+    return [0.5 + float(score) for score in vectors[1:] @ vectors[0]]
+
+
+def generate_title_local(message: list[dict]) -> str:
+    """Keyphrase (RAKE-style) title: highest scoring phrases between stop words, in message order.
+
+    Normalized tokens are only used for matching and scoring; the title keeps the user's spelling.
+    """
+    text = " ".join(m.get("content", "") for m in message if m.get("role", "user") == "user")
+    tokens = [token.strip(ZWNJ) for token in TOKEN.findall(text) if token.strip(ZWNJ)]
+    keys = {token: token_key(token) for token in tokens}
+    phrases = candidate_phrases(tokens, keys)
+    if not phrases:
+        return ""
+
+    frequency, degree = {}, {}
+    for _, words in phrases:
+        for word in words:
+            key = keys[word]
+            frequency[key] = frequency.get(key, 0) + 1
+            degree[key] = degree.get(key, 0) + len(words)
+    scores = [sum(degree[keys[w]] / frequency[keys[w]] for w in words) for _, words in phrases]
+    if title_embedding_scoring and len(phrases) > 1:
+        weights = embedding_weights([normalize_text(" ".join(words)) for _, words in phrases], normalize_text(text))
+        scores = [score * weight for score, weight in zip(scores, weights)]
+
+    ranked = sorted(range(len(phrases)), key=lambda i: (-scores[i], phrases[i][0]))
+    selected, used_words = [], 0
+    for i in ranked:
+        if used_words >= title_max_words:
+            break
+        selected.append(i)
+        used_words += len(phrases[i][1])
+    words = [word for i in sorted(selected) for word in phrases[i][1]]
+    return " ".join(words[:title_max_words])[:TITLE_MAX_CHARS]
+
+
+def generate_title_llm(message: list[dict]) -> str:
     prompt = f"""
 بر اساس این پیام کاربر یک عنوان مناسب  و کوتاه برای چت ایجاد بکن.
 در خروجی فقط عنوان را برگردان.
@@ -18,4 +140,20 @@ def generate_title(message: list[dict]) -> str:
 پیام کاربر: {message}
     """
     response = llm.invoke(prompt)
-    return response.content
\ No newline at end of file
+    return response.content.strip()[:TITLE_MAX_CHARS]
+
+
+def generate_title_fallback(message: list[dict]) -> str:
+    text = " ".join(m.get("content", "") for m in message if m.get("role", "user") == "user")
+    return " ".join(text.split()[:title_max_words])[:TITLE_MAX_CHARS]
+
+
+def generate_title(message: list[dict], deadline: float = None) -> str:
+    """The LLM is only asked if its call cannot outlast the request's deadline."""
+    if title_generator == "local":
+        title = generate_title_local(message)
+        if title:
+            return title
+    if deadline is not None and deadline - time.monotonic() < title_llm_timeout_seconds:
+        return generate_title_fallback(message)
+    return generate_title_llm(message)